@@ -1,6 +1,7 @@
+import importlib
 import streamlit as st
-from backend import get_requests, get_assignments, get_employee_data
-from frontend import overtime_requester, coordinator_portal, manager_reports, tv_display
+from setup import migrate
+from shifts import SHIFT_BLOCKS
 
 # Page configuration and custom CSS
 st.set_page_config(page_title="Overtime Tracker", layout="wide")
@@ -15,34 +16,38 @@ st.markdown(
     unsafe_allow_html=True
 )
 
-# Load data from the SQLite database using backend functions
-requests_log = get_requests()
-assignments_log = get_assignments()
-employee_data = get_employee_data()
-
-# Global variable: shift blocks (for use in the TV display)
-shift_blocks = [
-    "7:00 AM - 11:00 AM", "11:00 AM - 3:00 PM", "3:00 PM - 7:00 PM",
-    "7:00 PM - 11:00 PM", "11:00 AM - 3:00 AM", "3:00 AM - 7:00 AM"
+@st.cache_resource
+def ensure_schema():
+    """Apply pending schema migrations once per server process."""
+    return migrate()
+
+ensure_schema()
+
+# Views: (label, module, URL slug). Modules are imported on first use, so
+# e.g. matplotlib is only loaded once someone opens Manager Reports.
+VIEWS = [
+    ("Overtime Requester", "frontend.overtime_requester", "requester"),
+    ("Coordinator Portal", "frontend.coordinator_portal", "coordinator"),
+    ("Manager Reports", "frontend.manager_reports", "reports"),
+    ("TV Display", "frontend.tv_display", "tv"),
+    ("Performance", "frontend.admin_panel", "admin"),
 ]
 
-# Create tabs for the app
-tab1, tab2, tab3, tab4 = st.tabs([
-    "Overtime Requester",
-    "Coordinator Portal",
-    "Manager Reports",
-    "TV Display"
-])
-
-with tab1:
-    # Pass the preloaded employee_data to overtime_requester.app()
-    overtime_requester.app(employee_data)
-
-with tab2:
-    coordinator_portal.app(requests_log)
-
-with tab3:
-    manager_reports.app(requests_log, assignments_log)
-
-with tab4:
-    tv_display.app(assignments_log, shift_blocks)
+# A kiosk can be pinned to one view with ?view=<slug> (e.g. ?view=tv);
+# otherwise the sidebar lets the user pick. Only the selected view runs.
+# The Performance panel is only listed with ?admin=1.
+slugs = {slug: label for label, _, slug in VIEWS}
+pinned_view = slugs.get(st.query_params.get("view", ""))
+if pinned_view:
+    selected_view = pinned_view
+else:
+    labels = [label for label, _, slug in VIEWS if slug != "admin" or st.query_params.get("admin") == "1"]
+    selected_view = st.sidebar.radio("View", labels, key="view")
+
+module_name = next(module for label, module, _ in VIEWS if label == selected_view)
+view = importlib.import_module(module_name)
+
+if selected_view == "TV Display":
+    view.app(SHIFT_BLOCKS)
+else:
+    view.app()
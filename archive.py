@@ -0,0 +1,203 @@
+# archive.py
+"""
+Cold-history archive: closed months of assignments and requests are moved
+out of SQLite into one Parquet file per table and month,
+
+    archive/assignments/month=2024-01/data.parquet
+
+so the live database only holds recent rows. The rollup and hours ledger
+keep covering the whole history, so reports and the coordinator are
+unaffected; exports read archived months through iter_assignments_between(),
+which only opens the partitions overlapping the date range and only reads
+the requested columns.
+
+    python archive.py                  # archive all but the last 2 months
+    python archive.py --keep-months 6 --vacuum   # and shrink the database file
+
+Requires pyarrow; without it nothing is archived and reads use SQLite only.
+"""
+import argparse
+import os
+from datetime import date, timedelta
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Archiving is optional
+    pa = ds = pq = None
+
+import backend
+from database import connection, get_connection
+from events import log_event
+from instrumentation import timed
+
+ARCHIVE_DIR = os.environ.get("OVERTIME_ARCHIVE", "archive")
+ARCHIVED_TABLES = {
+    "assignments": backend.ASSIGNMENT_COLUMNS,
+    "requests": backend.REQUEST_COLUMNS,
+}
+# Months kept in SQLite, counting the current one
+KEEP_MONTHS = 2
+INTEGER_COLUMNS = ["id", "Override"]
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("Archiving needs pyarrow (pip install pyarrow).")
+
+def _schema(table_name):
+    """Arrow schema for an archived table: integer ids/flags, text for the rest."""
+    return pa.schema([
+        (column, pa.int64() if column in INTEGER_COLUMNS else pa.string())
+        for column in ARCHIVED_TABLES[table_name]
+    ])
+
+def _month_start(day, months_back=0):
+    """First day of the month `months_back` months before `day`'s month."""
+    index = day.year * 12 + day.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+def _partition_path(table_name, month):
+    return os.path.join(ARCHIVE_DIR, table_name, f"month={month}", "data.parquet")
+
+def archived_months(table_name):
+    """Return the archived months ("YYYY-MM") of a table, oldest first."""
+    root = os.path.join(ARCHIVE_DIR, table_name)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        entry[len("month="):] for entry in os.listdir(root)
+        if entry.startswith("month=") and os.path.exists(_partition_path(table_name, entry[len("month="):]))
+    )
+
+def live_since(table_name="assignments"):
+    """
+    First day after the newest archived month of a table (None if nothing
+    is archived): from there on, SQLite holds every row, so the rollup and
+    hours ledger can be rebuilt from it, and earlier CSV rows are not
+    imported again.
+    """
+    months = archived_months(table_name)
+    if not months:
+        return None
+    return _month_start(date.fromisoformat(f"{months[-1]}-01"), -1)
+
+@timed()
+def archive_month(table_name, month):
+    """
+    Move one month ("YYYY-MM") of a table from SQLite to its Parquet
+    partition and return the number of rows moved.
+
+    The partition is written (merged with any earlier one, by id) before
+    the rows are deleted, and only rows up to the highest id read are
+    deleted, so a crash or a concurrent late insert never loses data;
+    re-running picks up whatever is left.
+    """
+    _require_pyarrow()
+    columns = ARCHIVED_TABLES[table_name]
+    first = date.fromisoformat(f"{month}-01")
+    last = _month_start(first, -1) - timedelta(days=1)
+    quoted = ", ".join(f'"{c}"' for c in columns)
+    with connection() as conn:
+        df = pd.read_sql_query(
+            f'SELECT {quoted} FROM {table_name} WHERE "Date" BETWEEN ? AND ? ORDER BY "Date", id',
+            conn, params=[first.isoformat(), last.isoformat()]
+        )
+    if df.empty:
+        return 0
+
+    schema = _schema(table_name)
+    path = _partition_path(table_name, month)
+    if os.path.exists(path):
+        earlier = pq.read_table(path, schema=schema).to_pandas()
+        df_all = pd.concat([earlier, df], ignore_index=True)
+        df_all = df_all.drop_duplicates("id", keep="last").sort_values(["Date", "id"])
+    else:
+        df_all = df
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    pq.write_table(pa.Table.from_pandas(df_all, schema=schema, preserve_index=False),
+                   tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+    max_id = int(df["id"].max())
+    def write(conn):
+        moved = conn.execute(
+            f'DELETE FROM {table_name} WHERE "Date" BETWEEN ? AND ? AND id <= ?',
+            (first.isoformat(), last.isoformat(), max_id)
+        ).rowcount
+        log_event(conn, "archived", payload={"table": table_name, "month": month, "rows": moved})
+        return moved
+    return backend.submit_write(write).result()
+
+@timed()
+def archive_closed_months(keep_months=KEEP_MONTHS, today=None):
+    """
+    Archive every month older than the last `keep_months` (counting the
+    current one) for each archived table. Returns {table: rows moved}.
+    """
+    _require_pyarrow()
+    cutoff = _month_start(today or date.today(), keep_months - 1).isoformat()
+    moved = {}
+    for table_name in ARCHIVED_TABLES:
+        with connection() as conn:
+            months = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT substr("Date", 1, 7) FROM {table_name} WHERE "Date" < ? ORDER BY 1',
+                (cutoff,)
+            )]
+        moved[table_name] = sum(archive_month(table_name, month) for month in months)
+    return moved
+
+def _dataset(table_name, start_date, end_date):
+    """The table's archived partitions overlapping a date range, or None."""
+    if ds is None:
+        return None
+    first, last = start_date.isoformat()[:7], end_date.isoformat()[:7]
+    paths = [_partition_path(table_name, month) for month in archived_months(table_name)
+             if first <= month <= last]
+    if not paths:
+        return None
+    return ds.dataset(paths, schema=_schema(table_name), format="parquet")
+
+@timed()
+def iter_assignments_between(start_date, end_date, blocks=None, lines=None,
+                             positions=None, types=None, columns=None, chunksize=10000):
+    """
+    Like backend.iter_assignments_between(), but covering archived months
+    too: chunks from the matching Parquet partitions (pruned by month, only
+    the requested columns read) come first, then the rows still in SQLite.
+    """
+    columns = list(backend.ASSIGNMENT_COLUMNS if columns is None else columns)
+    dataset = _dataset("assignments", start_date, end_date)
+    if dataset is not None:
+        condition = (ds.field("Date") >= start_date.isoformat()) & (ds.field("Date") <= end_date.isoformat())
+        for column, values in [("Block", blocks), ("Line", lines), ("Position", positions), ("Type", types)]:
+            if values is not None:
+                condition &= ds.field(column).isin(list(values))
+        for batch in dataset.to_batches(columns=columns, filter=condition, batch_size=chunksize):
+            if batch.num_rows:
+                yield batch.to_pandas()
+    yield from backend.iter_assignments_between(
+        start_date, end_date, blocks=blocks, lines=lines, positions=positions,
+        types=types, columns=columns, chunksize=chunksize
+    )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move closed months of history to Parquet.")
+    parser.add_argument("--keep-months", type=int, default=KEEP_MONTHS,
+                        help="Months to keep in SQLite, counting the current one")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Rebuild the database file afterwards to return the freed space")
+    args = parser.parse_args()
+
+    for table_name, rows in archive_closed_months(args.keep_months).items():
+        print(f"{table_name}: {rows} rows archived")
+    backend.shutdown_writer()
+    if args.vacuum:
+        conn = get_connection()
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
@@ -1,61 +1,844 @@
+import hashlib
+import json
 import pandas as pd
-import sqlite3
-from database import get_connection
+from datetime import date as date_type, datetime, timedelta
+from database import DATE_COLUMNS, connection
+from events import EVENT_COLUMNS, apply_event, load_snapshot, log_event, take_snapshot
+from instrumentation import timed
+from query_cache import QueryCache
+from shifts import ScheduleConflict, find_conflict, interval
+from writer import Writer
 
+REQUEST_COLUMNS = ["id", "Name", "Date", "Block", "Request Time"]
+ASSIGNMENT_COLUMNS = [
+    "id", "Name", "Date", "Block", "Line", "Position",
+    "Assignment Time", "Assigned By", "Type", "Override"
+]
+
+# Shared across all sessions in this process; writes bump its data version
+CACHE_MAX_ENTRIES = 256
+CACHE_TTL_SECONDS = 300
+_cache = QueryCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SECONDS)
+
+# Column types applied once when a frame is read: dates and timestamps are
+# parsed, the repetitive text columns become categoricals
+TIMESTAMP_COLUMNS = ["Request Time", "Assignment Time", "Event Time"]
+CATEGORY_COLUMNS = ["Name", "Block", "Line", "Position", "Type", "Assigned By"]
+BOOL_COLUMNS = ["Override"]
+
+def _typed(df):
+    """Convert the known columns of a frame read from SQLite to their schema types."""
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format="%Y-%m-%d")
+    for column in TIMESTAMP_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format="ISO8601", errors="coerce")
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    for column in BOOL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].fillna(0).astype(bool)
+    return df
+
+def _read_sql(sql, params=()):
+    """
+    Run a SELECT through the shared read cache and return a typed DataFrame
+    (see _typed). Callers get a shallow copy, so adding or replacing columns
+    on the result never changes the cached frame.
+    """
+    def load():
+        with connection() as conn:
+            return _typed(pd.read_sql_query(sql, conn, params=list(params)))
+    return _cache.get_or_load(("sql", sql, tuple(params)), load).copy(deep=False)
+
+def cache_stats():
+    """Return hit/miss statistics for the shared read cache."""
+    return _cache.stats()
+
+def data_version():
+    """Return the current data version (bumped by every write in this process)."""
+    return _cache.version
+
+def invalidate_cache():
+    """Bump the data version so every session re-reads after a write."""
+    _cache.bump_version()
+
+# Every write goes through this process's single writer thread, which
+# group-commits queued operations; each batch bumps the data version once
+_writer = Writer(on_commit=invalidate_cache)
+
+def submit_write(op, *args, **kwargs):
+    """
+    Queue `op(conn, *args, **kwargs)` on the writer thread and return a
+    Future that resolves to its result once committed (or raises its error).
+    """
+    return _writer.submit(op, *args, **kwargs)
+
+def shutdown_writer():
+    """Commit any queued writes and stop the writer thread (it restarts on the next write)."""
+    _writer.shutdown()
+
+def _write(op):
+    """Run a write operation on the writer thread and wait for it to commit."""
+    return submit_write(op).result()
+
+@timed()
 def get_employee_data():
     """
     Retrieve employee data from the database.
     """
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM employees", conn)
-    conn.close()
-    return df
+    return _read_sql("SELECT * FROM employees")
 
+@timed()
 def get_requests():
     """
     Retrieve overtime requests from the database.
     """
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM requests", conn)
-    conn.close()
-    return df
+    return _read_sql("SELECT * FROM requests")
 
+@timed()
 def get_assignments():
     """
     Retrieve assignments data from the database.
     """
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM assignments", conn)
-    conn.close()
-    return df
+    return _read_sql("SELECT * FROM assignments")
+
+def _column_list(columns, allowed):
+    """Validate requested columns against the table's columns and quote them for SQL."""
+    columns = allowed if columns is None else columns
+    unknown = [c for c in columns if c not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    return ", ".join(f'"{c}"' for c in columns)
+
+def _add_in_filter(column, values, clauses, params):
+    """
+    Append a `column IN (...)` clause for a filter.
+    None means "no filter"; an empty selection matches nothing.
+    """
+    if values is None:
+        return
+    values = list(values)
+    if not values:
+        clauses.append("0")
+        return
+    clauses.append(f'"{column}" IN ({", ".join("?" * len(values))})')
+    params.extend(values)
+
+def _range_filters(start_date, end_date, blocks=None, lines=None, positions=None, types=None):
+    """Build the WHERE clauses and parameters for a date range plus filters."""
+    clauses = ['"Date" BETWEEN ? AND ?']
+    params = [start_date.isoformat(), end_date.isoformat()]
+    _add_in_filter("Block", blocks, clauses, params)
+    _add_in_filter("Line", lines, clauses, params)
+    _add_in_filter("Position", positions, clauses, params)
+    _add_in_filter("Type", types, clauses, params)
+    return clauses, params
+
+def _select_sql(table, allowed, columns, clauses, order_by=None):
+    """Build a filtered SELECT statement on `table`."""
+    sql = f"SELECT {_column_list(columns, allowed)} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    if order_by:
+        sql += f" ORDER BY {order_by}"
+    return sql
+
+def _query(table, allowed, columns, clauses, params, order_by=None):
+    """Run a filtered SELECT on `table` and return the result as a DataFrame."""
+    return _read_sql(_select_sql(table, allowed, columns, clauses, order_by), params)
 
+@timed()
+def get_requests_for_date(date, columns=None):
+    """
+    Retrieve the overtime requests for a single date.
+
+    Parameters:
+      - date: (datetime.date) The requested date.
+      - columns: (list) Columns to return (default: all request columns).
+    """
+    return _query("requests", REQUEST_COLUMNS, columns,
+                  ['"Date" = ?'], [date.isoformat()], order_by="id")
+
+# Request inbox orderings (SQL ORDER BY on requests r joined to employees e)
+REQUEST_SORTS = {
+    "Seniority": 'e."Hire Date" IS NULL, e."Hire Date", r."Request Time", r.id',
+    "Request Time": 'r."Request Time", r.id',
+    "Name": 'r."Name", r."Request Time", r.id',
+    "Shift": 's.seq IS NULL, s.seq, e."Hire Date" IS NULL, e."Hire Date", r."Request Time", r.id',
+}
+REQUEST_PAGE_SIZE = 25
+
+@timed()
+def count_requests_for_date(date):
+    """Return the number of pending requests for a date."""
+    df = _read_sql('SELECT COUNT(*) AS n FROM requests WHERE "Date" = ?', (date.isoformat(),))
+    return int(df["n"].iloc[0])
+
+@timed()
+def get_request_page(date, page=0, page_size=REQUEST_PAGE_SIZE, sort="Seniority"):
+    """
+    Return one page of a date's pending requests, with each employee's
+    position and hire date, in a REQUEST_SORTS order (most senior first by
+    default). Only the page's rows are read.
+    """
+    if sort not in REQUEST_SORTS:
+        raise ValueError(f"Unknown request sort: {sort!r}")
+    return _read_sql(
+        f"""
+        SELECT r.id, r."Name", r."Block", r."Request Time", e."Position", e."Hire Date"
+        FROM requests r
+        LEFT JOIN employees e ON e."Name" = r."Name"
+        LEFT JOIN shift_blocks s ON s."Block" = r."Block"
+        WHERE r."Date" = ?
+        ORDER BY {REQUEST_SORTS[sort]}
+        LIMIT ? OFFSET ?
+        """,
+        (date.isoformat(), page_size, page * page_size)
+    )
+
+@timed()
+def get_assignments_for_date(date, columns=None, blocks=None):
+    """
+    Retrieve the assignments for a single date, optionally for some blocks only.
+    """
+    clauses, params = ['"Date" = ?'], [date.isoformat()]
+    _add_in_filter("Block", blocks, clauses, params)
+    return _query("assignments", ASSIGNMENT_COLUMNS, columns, clauses, params, order_by="id")
+
+@timed()
+def get_assignments_between(start_date, end_date, blocks=None, lines=None,
+                            positions=None, types=None, columns=None):
+    """
+    Retrieve assignments dated from start_date to end_date (inclusive).
+
+    Each of blocks/lines/positions/types restricts the result to the given
+    values when provided; all filtering happens in SQL.
+    """
+    clauses, params = _range_filters(start_date, end_date, blocks, lines, positions, types)
+    return _query("assignments", ASSIGNMENT_COLUMNS, columns, clauses, params, order_by='"Date", id')
+
+@timed()
+def iter_assignments_between(start_date, end_date, blocks=None, lines=None,
+                             positions=None, types=None, columns=None, chunksize=10000):
+    """
+    Yield the same rows as get_assignments_between() as DataFrames of at
+    most `chunksize` rows, read straight from SQLite (bypassing the read
+    cache), so arbitrarily long histories can be exported in constant memory.
+    Values are left as stored (ISO date strings, 0/1 Override), which is
+    what the exports write out.
+    """
+    clauses, params = _range_filters(start_date, end_date, blocks, lines, positions, types)
+    sql = _select_sql("assignments", ASSIGNMENT_COLUMNS, columns, clauses, order_by='"Date", id')
+    with connection() as conn:
+        yield from pd.read_sql_query(sql, conn, params=params, chunksize=chunksize)
+
+@timed()
+def get_assignments_since(date, after_id=0, columns=None):
+    """
+    Retrieve a date's assignments with an id greater than `after_id`, in id
+    order. Used for delta polling, so it always reads the database directly
+    instead of the shared cache.
+    """
+    sql = _select_sql("assignments", ASSIGNMENT_COLUMNS, columns,
+                      ['"Date" = ?', "id > ?"], order_by="id")
+    with connection() as conn:
+        return _typed(pd.read_sql_query(sql, conn, params=[_iso_date(date), int(after_id)]))
+
+@timed()
+def get_assignment_filter_options(start_date, end_date):
+    """
+    Return the distinct Block/Line/Position values used by assignments
+    in a date range, as a dict of sorted lists (read from the rollup).
+    """
+    options = {}
+    for column in ["Block", "Line", "Position"]:
+        df = _read_sql(
+            f'SELECT DISTINCT "{column}" FROM assignment_rollup '
+            f'WHERE "Date" BETWEEN ? AND ? ORDER BY 1',
+            (start_date.isoformat(), end_date.isoformat())
+        )
+        options[column] = df[column].tolist()
+    return options
+
+ROLLUP_DIMENSIONS = ["Date", "Block", "Line", "Position", "Type"]
+
+@timed()
+def get_rollup_counts(dimension, start_date, end_date, blocks=None, lines=None,
+                      positions=None, types=None):
+    """
+    Return assignment counts from the daily rollup for a date range,
+    grouped by `dimension` and Type (columns: dimension, "Type", "Count").
+    Filters work like get_assignments_between().
+    """
+    if dimension not in ROLLUP_DIMENSIONS:
+        raise ValueError(f"Unknown rollup dimension: {dimension}")
+    group_by = '"Type"' if dimension == "Type" else f'"{dimension}", "Type"'
+    clauses, params = _range_filters(start_date, end_date, blocks, lines, positions, types)
+    return _read_sql(
+        f'SELECT {group_by}, SUM("Count") AS "Count" FROM assignment_rollup '
+        f'WHERE {" AND ".join(clauses)} GROUP BY {group_by} ORDER BY {group_by}',
+        params
+    )
+
+@timed()
+def rollup_fingerprint(start_date, end_date):
+    """
+    Return a hash of the report rollup for a date range. It changes whenever
+    an assignment in the range is added or the rollup is rebuilt with
+    different data, so it tells whether a stored report is still current.
+    """
+    df = _read_sql(
+        'SELECT "Date", "Block", "Line", "Position", "Type", "Count" FROM assignment_rollup '
+        'WHERE "Date" BETWEEN ? AND ? ORDER BY 1, 2, 3, 4, 5',
+        (start_date.isoformat(), end_date.isoformat())
+    )
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return hashlib.sha256(hashes.values.tobytes()).hexdigest()
+
+# Rolling windows (days, ending on the as-of date) for overtime hour totals
+LEDGER_WINDOWS = [7, 30, 365]
+
+@timed()
+def get_overtime_totals(as_of, names=None, position=None):
+    """
+    Return each employee's overtime hours over the rolling LEDGER_WINDOWS
+    ending on `as_of`: columns "Name" plus "Volunteer 7d", "Mandate 7d",
+    "Total 7d" and so on for each window. Read from the daily ledger, so it
+    never touches the assignments history.
+
+    Parameters:
+      - names: (list) Only these employees (all listed names get a row).
+      - position: (str) Only employees currently in this position.
+    """
+    end = date_type.fromisoformat(_iso_date(as_of))
+    starts = {days: (end - timedelta(days=days - 1)).isoformat() for days in LEDGER_WINDOWS}
+    sums, params = [], []
+    for days in LEDGER_WINDOWS:
+        for assignment_type in ["Volunteer", "Mandate"]:
+            sums.append(f'SUM(CASE WHEN "Type" = ? AND "Date" >= ? THEN "Hours" ELSE 0.0 END) AS "{assignment_type} {days}d"')
+            params += [assignment_type, starts[days]]
+        sums.append(f'SUM(CASE WHEN "Date" >= ? THEN "Hours" ELSE 0.0 END) AS "Total {days}d"')
+        params.append(starts[days])
+    clauses = ['"Date" BETWEEN ? AND ?']
+    params += [starts[max(LEDGER_WINDOWS)], end.isoformat()]
+    _add_in_filter("Name", names, clauses, params)
+    if position is not None:
+        clauses.append('"Name" IN (SELECT "Name" FROM employees WHERE "Position" = ?)')
+        params.append(position)
+    totals = _read_sql(
+        f'SELECT "Name", {", ".join(sums)} FROM overtime_ledger '
+        f'WHERE {" AND ".join(clauses)} GROUP BY "Name"',
+        params
+    )
+    if names is not None:
+        # Employees without overtime in the window still get a row of zeros
+        totals = (totals.astype({"Name": str}).set_index("Name")
+                  .reindex(list(names), fill_value=0.0).rename_axis("Name").reset_index())
+    return totals
+
+def _iso_date(value):
+    """Normalize a date, datetime, Timestamp or ISO string to "YYYY-MM-DD"."""
+    if isinstance(value, str):
+        return value[:10]
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date_type):
+        return value.isoformat()
+    raise TypeError(f"Expected a date, got {value!r}")
+
+def _block_interval(conn, date, block):
+    """Return a block's absolute (start, end) minutes on a date; ValueError if unknown."""
+    row = conn.execute(
+        'SELECT start_minute, end_minute FROM shift_blocks WHERE "Block" = ?', (block,)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Unknown shift block: {block!r}")
+    return interval(_iso_date(date), *row)
+
+def _scheduled_intervals(conn, name, date):
+    """
+    Return an employee's assigned blocks from the day before to the day after
+    `date` as absolute (start, end) minutes (a name/date index range scan).
+    """
+    day = date_type.fromisoformat(_iso_date(date))
+    rows = conn.execute(
+        """
+        SELECT a."Date", b.start_minute, b.end_minute
+        FROM assignments a JOIN shift_blocks b ON b."Block" = a."Block"
+        WHERE a."Name" = ? AND a."Date" BETWEEN ? AND ?
+        """,
+        (name, (day - timedelta(days=1)).isoformat(), (day + timedelta(days=1)).isoformat())
+    ).fetchall()
+    return [interval(*row) for row in rows]
+
+def _check_schedule(conn, name, date, block, scheduled=None):
+    """
+    Raise ScheduleConflict if assigning `block` on `date` would double-book
+    the employee or break the rest-period rules (see shifts.find_conflict),
+    given their `scheduled` intervals (default: their assignments around
+    `date`). Returns the block's absolute (start, end) minutes.
+    """
+    new = _block_interval(conn, date, block)
+    if scheduled is None:
+        scheduled = _scheduled_intervals(conn, name, date)
+    problem = find_conflict(scheduled, new)
+    if problem:
+        raise ScheduleConflict(f"{name} {problem} ({block} on {_iso_date(date)}).")
+    return new
+
+@timed()
 def save_request(name, date, blocks):
     """
-    Save an overtime request to the database.
+    Save an overtime request to the database, one row per block.
     
     Parameters:
       - name: (str) The employee's name.
       - date: (datetime.date) The date of the overtime request.
       - blocks: (list) A list of selected time blocks.
     
-    This function converts the blocks list into a comma-separated string.
+    Blocks already requested are ignored. The blocks are checked like an
+    assignment would be, against the employee's assignments and each
+    other, so every request saved can also be approved: raises
+    ScheduleConflict (saving nothing) if one would double-book the
+    employee or break the rest-period rules, and ValueError for an unknown
+    block.
     """
-    # Convert the list of blocks into a comma-separated string
-    blocks_str = ", ".join(blocks)
-    
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    try:
-        # Insert the request into the 'requests' table.
-        # Adjust the SQL if your table schema uses different column names.
-        cursor.execute(
-            "INSERT INTO requests (Name, Date, Block) VALUES (?, ?, ?)",
-            (name, date, blocks_str)
+    request_time = datetime.now().isoformat(sep=" ")
+    def write(conn):
+        scheduled = _scheduled_intervals(conn, name, date)
+        # In time order, so back-to-back blocks join one stretch as they are added
+        for block in sorted(set(blocks), key=lambda block: _block_interval(conn, date, block)):
+            scheduled.append(_check_schedule(conn, name, date, block, scheduled))
+            cursor = conn.execute(
+                """
+                INSERT INTO requests ("Name", "Date", "Block", "Request Time") VALUES (?, ?, ?, ?)
+                ON CONFLICT ("Name", "Date", "Block") DO NOTHING
+                """,
+                (name, _iso_date(date), block, request_time)
+            )
+            if cursor.rowcount:
+                log_event(conn, "request_added", name, _iso_date(date), {
+                    "id": cursor.lastrowid, "Name": name, "Date": _iso_date(date),
+                    "Block": block, "Request Time": request_time,
+                })
+    return _write(write)
+
+def _lookup_idempotency_key(conn, idempotency_key):
+    """Return the assignment id already recorded for a key, or None."""
+    if idempotency_key is None:
+        return None
+    row = conn.execute(
+        'SELECT assignment_id FROM idempotency_keys WHERE "key" = ?', (idempotency_key,)
+    ).fetchone()
+    return row[0] if row else None
+
+def _record_idempotency_key(conn, idempotency_key, assignment_id):
+    """Remember the assignment produced by a key (no-op without a key)."""
+    if idempotency_key is not None:
+        conn.execute(
+            'INSERT INTO idempotency_keys ("key", assignment_id, created) VALUES (?, ?, ?)',
+            (idempotency_key, assignment_id, datetime.now().isoformat(sep=" "))
+        )
+
+def _insert_assignment(conn, name, date, block, line, position, assignment_type,
+                       override, assigned_by):
+    """
+    Insert one assignment row (counting it in the rollup and the overtime
+    ledger) on an open transaction and return its id. Raises
+    ScheduleConflict first if the employee cannot work that block.
+    """
+    start, end = _check_schedule(conn, name, date, block)
+    row = {
+        "Name": name, "Date": _iso_date(date), "Block": block, "Line": line,
+        "Position": position, "Assignment Time": datetime.now().isoformat(sep=" "),
+        "Assigned By": assigned_by, "Type": assignment_type, "Override": int(bool(override)),
+    }
+    cursor = conn.execute(
+        """
+        INSERT INTO assignments ("Name", "Date", "Block", "Line", "Position",
+                                 "Assignment Time", "Assigned By", "Type", "Override")
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        tuple(row.values())
+    )
+    log_event(conn, "assignment_added", name, _iso_date(date), {"id": cursor.lastrowid, **row})
+    # Keep the report rollup in step with the raw rows
+    conn.execute(
+        """
+        INSERT INTO assignment_rollup ("Date", "Block", "Line", "Position", "Type", "Count")
+        VALUES (?, ?, ?, ?, ?, 1)
+        ON CONFLICT ("Date", "Block", "Line", "Position", "Type")
+        DO UPDATE SET "Count" = "Count" + 1
+        """,
+        (_iso_date(date), block, line or "", position or "", assignment_type)
+    )
+    conn.execute(
+        """
+        INSERT INTO overtime_ledger ("Name", "Date", "Type", "Hours")
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT ("Name", "Date", "Type") DO UPDATE SET "Hours" = "Hours" + excluded."Hours"
+        """,
+        (name, _iso_date(date), assignment_type, (end - start) / 60)
+    )
+    return cursor.lastrowid
+
+@timed()
+def save_assignment(name, date, block, line, position, assignment_type,
+                    override=False, assigned_by="Coordinator", idempotency_key=None):
+    """
+    Save an assignment to the database and return its id.
+
+    Parameters:
+      - idempotency_key: (str) Optional. Repeating a call with the same key
+        returns the original assignment id instead of inserting a duplicate.
+    """
+    def write(conn):
+        existing = _lookup_idempotency_key(conn, idempotency_key)
+        if existing is not None:
+            return existing
+        assignment_id = _insert_assignment(
+            conn, name, date, block, line, position, assignment_type, override, assigned_by
+        )
+        _rotate_queue(conn, assignment_type, name)
+        _record_idempotency_key(conn, idempotency_key, assignment_id)
+        return assignment_id
+    return _write(write)
+
+@timed()
+def remove_request(name, date, block):
+    """
+    Remove a pending overtime request from the database.
+    Returns the number of rows removed.
+    """
+    def write(conn):
+        removed = conn.execute(
+            'SELECT id, "Name", "Date", "Block", "Request Time" FROM requests '
+            'WHERE "Name" = ? AND "Date" = ? AND "Block" = ?',
+            (name, _iso_date(date), block)
+        ).fetchall()
+        for row in removed:
+            conn.execute("DELETE FROM requests WHERE id = ?", (row[0],))
+            _log_request_removed(conn, row, "withdrawn")
+        return len(removed)
+    return _write(write)
+
+def _log_request_removed(conn, row, reason):
+    """Log a deleted request row (id, Name, Date, Block, Request Time)."""
+    payload = dict(zip(REQUEST_COLUMNS, row))
+    log_event(conn, "request_removed", payload["Name"], payload["Date"], {**payload, "reason": reason})
+
+@timed()
+def approve_request(request_id, line, position, idempotency_key=None,
+                    assigned_by="Coordinator"):
+    """
+    Approve a volunteer request: in one transaction, assign the employee
+    to the given line/position, remove the request and move the employee
+    to the back of the volunteer queue.
+
+    Returns the assignment id. With an idempotency key, a repeated call
+    (double-click, rerun) returns the original assignment; without one, a
+    request that has already been approved raises ValueError.
+    """
+    def write(conn):
+        existing = _lookup_idempotency_key(conn, idempotency_key)
+        if existing is not None:
+            return existing
+        request = conn.execute(
+            'SELECT "Name", "Date", "Block" FROM requests WHERE id = ?', (request_id,)
+        ).fetchone()
+        if request is None:
+            raise ValueError(f"Request {request_id} is no longer pending.")
+        name, date, block = request
+        assignment_id = _insert_assignment(
+            conn, name, date, block, line, position, "Volunteer", False, assigned_by
+        )
+        _fill_request(conn, request_id)
+        _rotate_queue(conn, "Volunteer", name)
+        _record_idempotency_key(conn, idempotency_key, assignment_id)
+        return assignment_id
+    return _write(write)
+
+def _fill_request(conn, request_id):
+    """Delete a pending request on an open transaction; ValueError if it is gone."""
+    row = conn.execute(
+        'SELECT id, "Name", "Date", "Block", "Request Time" FROM requests WHERE id = ?', (request_id,)
+    ).fetchone()
+    if row is None:
+        raise ValueError(f"Request {request_id} is no longer pending.")
+    conn.execute("DELETE FROM requests WHERE id = ?", (request_id,))
+    _log_request_removed(conn, row, "filled")
+
+@timed()
+def save_assignments(date, assignments, assigned_by="Coordinator", idempotency_key=None):
+    """
+    Save a batch of assignments for one date in a single transaction and
+    return their ids, in order.
+
+    Parameters:
+      - assignments: (list) Mappings with "Name", "Block", "Line", "Position",
+        "Type" and optionally "Request", the id of the volunteer request the
+        assignment fills (the request is removed).
+      - idempotency_key: (str) Optional. Repeating a call with the same key
+        and batch returns the original ids instead of inserting duplicates.
+
+    Each assignee moves to the back of their queue, in batch order. If any
+    request is no longer pending or any assignment conflicts with the
+    employee's schedule, nothing is saved and ValueError (ScheduleConflict)
+    is raised.
+    """
+    def write(conn):
+        assignment_ids = []
+        for i, item in enumerate(assignments):
+            key = None if idempotency_key is None else f"{idempotency_key}:{i}"
+            existing = _lookup_idempotency_key(conn, key)
+            if existing is not None:
+                assignment_ids.append(existing)
+                continue
+            request_id = item.get("Request")
+            if request_id is not None and not pd.isna(request_id):
+                _fill_request(conn, int(request_id))
+            assignment_id = _insert_assignment(
+                conn, item["Name"], date, item["Block"], item["Line"], item["Position"],
+                item["Type"], False, assigned_by
+            )
+            _rotate_queue(conn, item["Type"], item["Name"])
+            _record_idempotency_key(conn, key, assignment_id)
+            assignment_ids.append(assignment_id)
+        return assignment_ids
+    return _write(write)
+
+@timed()
+def get_queue(queue, position=None):
+    """
+    Return a seniority queue ("Volunteer" or "Mandate") in rotation order,
+    optionally for a single position.
+    """
+    sql = 'SELECT "Name", "Position", seq FROM seniority_queue WHERE queue = ?'
+    params = [queue]
+    if position is not None:
+        sql += ' AND "Position" = ?'
+        params.append(position)
+    return _read_sql(sql + ' ORDER BY "Position", seq', params)
+
+@timed()
+def next_up(queue, position):
+    """Return the name at the front of a position's queue, or None if it is empty."""
+    df = _read_sql(
+        'SELECT "Name" FROM seniority_queue WHERE queue = ? AND "Position" = ? ORDER BY seq LIMIT 1',
+        (queue, position)
+    )
+    return None if df.empty else df["Name"].iloc[0]
+
+def _rotate_queue(conn, queue, name):
+    """Move an employee to the back of their position's queue (two index seeks)."""
+    cursor = conn.execute(
+        """
+        UPDATE seniority_queue
+        SET seq = (SELECT MAX(q.seq) + 1 FROM seniority_queue q
+                   WHERE q.queue = seniority_queue.queue
+                     AND q."Position" IS seniority_queue."Position")
+        WHERE queue = ? AND "Name" = ?
+        """,
+        (queue, name)
+    )
+    if cursor.rowcount:
+        rotated = conn.execute(
+            'SELECT queue, "Name", "Position", seq FROM seniority_queue WHERE queue = ? AND "Name" = ?',
+            (queue, name)
+        ).fetchone()
+        log_event(conn, "queue_rotated", name, None, dict(zip(["queue", "Name", "Position", "seq"], rotated)))
+
+@timed()
+def rotate_queue(queue, name):
+    """Move an employee to the back of a seniority queue."""
+    def write(conn):
+        _rotate_queue(conn, queue, name)
+    return _write(write)
+
+@timed()
+def sync_seniority_queues():
+    """
+    Bring the seniority queues in line with the employees table:
+    employees who left are removed, new hires (and employees whose position
+    changed) join the back of their position's queue in seniority order.
+    """
+    def write(conn):
+        removed = conn.execute(
+            'DELETE FROM seniority_queue WHERE "Name" NOT IN (SELECT "Name" FROM employees)'
+        ).rowcount
+        removed += conn.execute(
+            """
+            DELETE FROM seniority_queue
+            WHERE "Position" IS NOT (SELECT e."Position" FROM employees e
+                                     WHERE e."Name" = seniority_queue."Name")
+            """
+        ).rowcount
+        added = 0
+        for queue, direction in [("Volunteer", "ASC"), ("Mandate", "DESC")]:
+            added += conn.execute(
+                f"""
+                INSERT INTO seniority_queue (queue, "Name", "Position", seq)
+                SELECT ?, e."Name", e."Position",
+                       (SELECT COALESCE(MAX(seq), 0) FROM seniority_queue WHERE queue = ?)
+                       + ROW_NUMBER() OVER (ORDER BY e."Hire Date" {direction}, e."Name")
+                FROM employees e
+                WHERE e."Name" NOT IN (SELECT "Name" FROM seniority_queue WHERE queue = ?)
+                """,
+                (queue, queue, queue)
+            ).rowcount
+        if removed or added:
+            log_event(conn, "queues_synced", payload={"removed": removed, "added": added})
+    return _write(write)
+
+def _rebuild_since(conn, since):
+    """
+    First date a rebuild covers: `since`, or else the oldest date still in
+    SQLite. Months archived to Parquet (see archive.py) keep their rollup
+    and ledger rows, which cannot be recomputed from the live table.
+    """
+    if since is not None:
+        return _iso_date(since)
+    return conn.execute('SELECT MIN("Date") FROM assignments').fetchone()[0]
+
+@timed()
+def rebuild_assignment_rollup(since=None):
+    """
+    Recompute the daily report rollup from the assignments table, for the
+    dates from `since` (default: the oldest assignment in SQLite) onwards.
+    """
+    def write(conn):
+        first = _rebuild_since(conn, since)
+        conn.execute('DELETE FROM assignment_rollup WHERE "Date" >= ?', (first,))
+        conn.execute(
+            """
+            INSERT INTO assignment_rollup ("Date", "Block", "Line", "Position", "Type", "Count")
+            SELECT "Date", "Block", COALESCE("Line", ''), COALESCE("Position", ''), "Type", COUNT(*)
+            FROM assignments
+            WHERE "Date" >= ?
+            GROUP BY 1, 2, 3, 4, 5
+            """,
+            (first,)
+        )
+    return _write(write)
+
+@timed()
+def rebuild_overtime_ledger(since=None):
+    """
+    Recompute the daily overtime-hours ledger from the assignments table,
+    for the dates from `since` (default: the oldest assignment in SQLite)
+    onwards.
+    """
+    def write(conn):
+        first = _rebuild_since(conn, since)
+        conn.execute('DELETE FROM overtime_ledger WHERE "Date" >= ?', (first,))
+        conn.execute(
+            """
+            INSERT INTO overtime_ledger ("Name", "Date", "Type", "Hours")
+            SELECT a."Name", a."Date", a."Type", SUM(b.end_minute - b.start_minute) / 60.0
+            FROM assignments a JOIN shift_blocks b ON b."Block" = a."Block"
+            WHERE a."Date" >= ?
+            GROUP BY 1, 2, 3
+            """,
+            (first,)
         )
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    return _write(write)
+
+# ------------------------------------------------------------
+# Change log (see events.py)
+# ------------------------------------------------------------
+# Events read per query while replaying
+EVENT_PAGE_SIZE = 10000
+
+@timed()
+def get_events_since(seq, limit=None, kinds=None):
+    """
+    Return the events after `seq`, oldest first, with each payload parsed
+    into a dict. Used for delta reads, so it always reads the database
+    directly instead of the shared cache.
+
+    Parameters:
+      - limit: (int) Optional. Most events returned; read on from the last seq.
+      - kinds: (list) Optional. Only these event kinds.
+    """
+    clauses, params = ["seq > ?"], [int(seq)]
+    _add_in_filter("kind", kinds, clauses, params)
+    sql = _select_sql("events", EVENT_COLUMNS, None, clauses, order_by="seq")
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    with connection() as conn:
+        df = _typed(pd.read_sql_query(sql, conn, params=params))
+    df["payload"] = [json.loads(p) for p in df["payload"]]
+    return df
+
+@timed()
+def latest_event_seq():
+    """Return the seq of the newest event (0 if the log is empty), read uncached."""
+    with connection() as conn:
+        return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+
+@timed()
+def load_live_state():
+    """
+    Return (seq, state): the latest snapshot with every later event
+    applied (see events.load_snapshot and events.apply_event).
+    """
+    with connection() as conn:
+        seq, state = load_snapshot(conn)
+    while True:
+        events = get_events_since(seq, limit=EVENT_PAGE_SIZE)
+        for event in events.to_dict("records"):
+            apply_event(state, event)
+        if len(events) < EVENT_PAGE_SIZE:
+            return seq if events.empty else int(events["seq"].iloc[-1]), state
+        seq = int(events["seq"].iloc[-1])
+
+@timed()
+def snapshot_state():
+    """Store a snapshot of the live state now and return the seq it reflects."""
+    return _write(take_snapshot)
+
+@timed()
+def log_import(table_name, counts):
+    """Record a bulk CSV import (see database.import_csv_to_table) in the change log."""
+    def write(conn):
+        return log_event(conn, "imported", payload={"table": table_name, **counts})
+    return _write(write)
+
+@timed()
+def get_override_log(start_date, end_date):
+    """
+    Return the audit trail of override assignments dated in a range: who
+    was assigned where, when and by whom, oldest first.
+
+    The overrides are read from the assignments themselves, so rows that
+    predate the change log or came in through a CSV import are included;
+    the log adds its seq and event time where it has the assignment, and
+    still covers overrides whose month has been archived out of SQLite.
+    """
+    return _read_sql(
+        """
+        SELECT e.seq, COALESCE(e."Event Time", a."Assignment Time") AS "Event Time",
+               a."Name", a."Date", a."Block", a."Line", a."Position", a."Type", a."Assigned By"
+        FROM assignments a
+        LEFT JOIN events e ON e.kind = 'assignment_added' AND e."Date" = a."Date"
+                          AND json_extract(e.payload, '$.id') = a.id
+        WHERE a."Override" = 1 AND a."Date" BETWEEN ? AND ?
+        UNION ALL
+        SELECT seq, "Event Time", "Name", "Date",
+               json_extract(payload, '$.Block'),
+               json_extract(payload, '$.Line'),
+               json_extract(payload, '$.Position'),
+               json_extract(payload, '$.Type'),
+               json_extract(payload, '$."Assigned By"')
+        FROM events
+        WHERE kind = 'assignment_added' AND "Date" BETWEEN ? AND ?
+          AND json_extract(payload, '$.Override') = 1
+          AND NOT EXISTS (SELECT 1 FROM assignments WHERE id = json_extract(payload, '$.id'))
+        ORDER BY "Event Time", "Date"
+        """,
+        (start_date.isoformat(), end_date.isoformat()) * 2
+    )
@@ -0,0 +1,9 @@
+"""
+Synthetic-data benchmarks for the backend and report paths.
+
+    python -m benchmarks --db /tmp/overtime_bench.db
+
+generates a seeded dataset (see benchmarks.generate), runs the timed
+scenarios in benchmarks.scenarios and writes the timings to JSON so runs
+from different versions can be compared.
+"""
@@ -0,0 +1,109 @@
+# benchmarks/__main__.py
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+
+import pandas as pd
+
+import database
+from benchmarks.generate import generate
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the synthetic-data benchmarks.")
+    parser.add_argument("--db", default="benchmark.db", help="Benchmark database path")
+    parser.add_argument("--reuse", action="store_true",
+                        help="Reuse an existing benchmark database instead of regenerating it")
+    parser.add_argument("--employees", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=1000000)
+    parser.add_argument("--assignments", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730, help="Days of history to spread rows over")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per scenario")
+    parser.add_argument("--only", action="append", help="Run scenarios whose name contains this text")
+    parser.add_argument("--output", default=None,
+                        help="JSON results file (default: benchmarks/results/<timestamp>.json)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    dataset_file = args.db + ".json"
+
+    if args.reuse and os.path.exists(args.db) and os.path.exists(dataset_file):
+        database.DATABASE_PATH = args.db
+        with open(dataset_file) as f:
+            dataset = json.load(f)
+    else:
+        for suffix in ["", "-wal", "-shm", ".json"]:
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+        started = time.perf_counter()
+        dataset = generate(args.db, employees=args.employees, requests=args.requests,
+                           assignments=args.assignments, days=args.days, seed=args.seed)
+        dataset["generate_seconds"] = round(time.perf_counter() - started, 3)
+        with open(dataset_file, "w") as f:
+            json.dump(dataset, f, indent=2)
+        print(f"Generated {args.db} in {dataset['generate_seconds']}s")
+
+    # Imported after the database path is set up
+    import backend
+    from benchmarks.scenarios import SCENARIOS, build_context
+
+    ctx = build_context(dataset)
+    results = {}
+    for name, func, cold in SCENARIOS:
+        if args.only and not any(text in name for text in args.only):
+            continue
+        timings = []
+        rows = 0
+        if not cold:
+            func(ctx)  # warm the cache once
+        for _ in range(args.repeat):
+            if cold:
+                backend.invalidate_cache()
+            started = time.perf_counter()
+            rows = func(ctx)
+            timings.append(time.perf_counter() - started)
+        results[name] = {
+            "repeat": args.repeat,
+            "min_s": min(timings),
+            "median_s": statistics.median(timings),
+            "mean_s": statistics.fmean(timings),
+            "max_s": max(timings),
+            "rows": rows,
+        }
+        print(f"{name:55s} median {results[name]['median_s'] * 1000:10.2f} ms  rows {rows}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "sqlite": database.sqlite3.sqlite_version,
+            "dataset": dataset,
+        },
+        "results": results,
+    }
+    output = args.output or os.path.join(
+        "benchmarks", "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/generate.py
+"""Seeded synthetic dataset generator for benchmarking at plant scale."""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+import backend
+import database
+from frontend.coordinator_portal import ALL_LINES
+from setup import migrate
+from shifts import SHIFT_BLOCKS
+
+POSITIONS = ["Case Packer", "Operator", "Denester", "Cheese Harp", "Placer", "Back Cart Operator"]
+TYPES = ["Volunteer", "Mandate"]
+BATCH_ROWS = 100000
+
+def _dates(rng, start, days, size):
+    """Random ISO date strings within `days` days from `start`."""
+    offsets = rng.integers(0, days, size)
+    calendar = np.array([(start + timedelta(days=int(i))).isoformat() for i in range(days)])
+    return calendar[offsets]
+
+def generate(db_path, employees=2000, requests=1000000, assignments=1000000,
+             days=730, end=None, seed=42):
+    """
+    Create a fresh database at `db_path` and fill it with synthetic data:
+    `employees` employees spread over the positions, and `requests` /
+    `assignments` rows spread over the `days` days ending at `end`
+    (default today) across ALL_LINES and the shift blocks.
+    Returns a summary dict describing the dataset.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    start = end - timedelta(days=days - 1)
+
+    backend.shutdown_writer()
+    database.close_pool()
+    database.DATABASE_PATH = str(db_path)
+    conn = database.get_connection()
+    try:
+        migrate(conn)
+
+        names = np.array([f"Employee {i:05d}" for i in range(employees)])
+        employee_positions = rng.choice(POSITIONS, employees)
+        hire_dates = _dates(rng, date(2000, 1, 1), 365 * 25, employees)
+        conn.executemany(
+            'INSERT INTO employees ("Name", "Hire Date", "Position") VALUES (?, ?, ?)',
+            zip(names.tolist(), hire_dates.tolist(), employee_positions.tolist())
+        )
+
+        stamp = datetime.now().isoformat(sep=" ")
+        for offset in range(0, requests, BATCH_ROWS):
+            size = min(BATCH_ROWS, requests - offset)
+            # Repeated (Name, Date, Block) draws are dropped, as the app would
+            conn.executemany(
+                'INSERT OR IGNORE INTO requests ("Name", "Date", "Block", "Request Time") VALUES (?, ?, ?, ?)',
+                zip(rng.choice(names, size).tolist(),
+                    _dates(rng, start, days, size).tolist(),
+                    rng.choice(SHIFT_BLOCKS, size).tolist(),
+                    [stamp] * size)
+            )
+
+        for offset in range(0, assignments, BATCH_ROWS):
+            size = min(BATCH_ROWS, assignments - offset)
+            who = rng.integers(0, employees, size)
+            conn.executemany(
+                """
+                INSERT INTO assignments ("Name", "Date", "Block", "Line", "Position",
+                                         "Assignment Time", "Assigned By", "Type", "Override")
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                zip(names[who].tolist(),
+                    _dates(rng, start, days, size).tolist(),
+                    rng.choice(SHIFT_BLOCKS, size).tolist(),
+                    rng.choice(ALL_LINES, size).tolist(),
+                    employee_positions[who].tolist(),
+                    [stamp] * size,
+                    ["Coordinator"] * size,
+                    rng.choice(TYPES, size).tolist(),
+                    (rng.random(size) < 0.05).astype(int).tolist())
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+    backend.sync_seniority_queues()
+    backend.rebuild_assignment_rollup()
+    backend.rebuild_overtime_ledger()
+    backend.snapshot_state()
+    return {
+        "employees": employees,
+        "requests": requests,
+        "assignments": assignments,
+        "days": days,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "seed": seed,
+    }
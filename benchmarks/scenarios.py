@@ -0,0 +1,124 @@
+# benchmarks/scenarios.py
+"""
+Timed benchmark scenarios. Each scenario takes the run context (dates and
+sample names drawn from the generated dataset) and returns the number of
+rows it produced, which is recorded next to its timings.
+"""
+from datetime import date, timedelta
+
+import pandas as pd
+
+import backend
+import exports
+import report_pipeline
+
+SCENARIOS = []
+
+def scenario(name, cold=True):
+    """
+    Register a benchmark scenario. Cold scenarios drop the shared read
+    cache before every repetition so they measure the database path.
+    """
+    def register(func):
+        SCENARIOS.append((name, func, cold))
+        return func
+    return register
+
+def _rows(result):
+    return len(result) if hasattr(result, "__len__") else 0
+
+# ------------------------------------------------------------
+# Full-table loads (what app.py used to run on every rerun)
+# ------------------------------------------------------------
+@scenario("backend.get_employee_data")
+def full_employees(ctx):
+    return _rows(backend.get_employee_data())
+
+@scenario("backend.get_requests")
+def full_requests(ctx):
+    return _rows(backend.get_requests())
+
+@scenario("backend.get_assignments")
+def full_assignments(ctx):
+    return _rows(backend.get_assignments())
+
+@scenario("backend.get_employee_data (cached)", cold=False)
+def cached_employees(ctx):
+    return _rows(backend.get_employee_data())
+
+# ------------------------------------------------------------
+# Date filtering as done by the coordinator and TV tabs
+# ------------------------------------------------------------
+@scenario("coordinator: requests for a date")
+def coordinator_requests(ctx):
+    return _rows(backend.get_requests_for_date(ctx["day"]))
+
+@scenario("tv: assignments for a date")
+def tv_assignments(ctx):
+    return _rows(backend.get_assignments_for_date(
+        ctx["day"], columns=["Block", "Line", "Name", "Position", "Type"]
+    ))
+
+@scenario("legacy: pandas date filter over all assignments")
+def legacy_date_filter(ctx):
+    df = backend.get_assignments()
+    dates = pd.to_datetime(df["Date"])
+    return _rows(df[dates.dt.date == ctx["day"]])
+
+# ------------------------------------------------------------
+# Manager Reports
+# ------------------------------------------------------------
+def _report_filters():
+    return dict(blocks=None, lines=None, positions=None, types=None)
+
+@scenario("reports: rollup aggregates, 1 month")
+def report_month(ctx):
+    data = report_pipeline.load_report_data(ctx["month_start"], ctx["end"], _report_filters())
+    return data["total_assignments"]
+
+@scenario("reports: rollup aggregates, 12 months")
+def report_year(ctx):
+    data = report_pipeline.load_report_data(ctx["year_start"], ctx["end"], _report_filters())
+    return data["total_assignments"]
+
+@scenario("legacy: pandas groupbys over 12 months")
+def legacy_report_year(ctx):
+    df = backend.get_assignments_between(ctx["year_start"], ctx["end"])
+    for dimension in ["Block", "Line", "Position"]:
+        df.groupby([dimension, "Type"])["Name"].nunique().unstack(fill_value=0)
+    df["Type"].value_counts()
+    return _rows(df)
+
+@scenario("reports: PDF build, 1 month")
+def report_pdf(ctx):
+    options = backend.get_assignment_filter_options(ctx["month_start"], ctx["end"])
+    key = exports.filter_key(ctx["month_start"], ctx["end"], options["Block"], options["Line"],
+                             options["Position"], ["Volunteer", "Mandate"])
+    return len(exports.build_pdf(key))
+
+@scenario("reports: on-screen charts + PDF, 1 month")
+def report_charts_pdf(ctx):
+    data = report_pipeline.load_report_data(ctx["month_start"], ctx["end"], _report_filters())
+    panels = report_pipeline.render_panels(data)
+    return len(panels) + len(report_pipeline.build_pdf(ctx["month_start"], ctx["end"], data))
+
+# ------------------------------------------------------------
+# Seniority queues
+# ------------------------------------------------------------
+@scenario("queues: rotate_queue")
+def rotate(ctx):
+    name = backend.next_up("Mandate", ctx["position"])
+    backend.rotate_queue("Mandate", name)
+    return 1
+
+def build_context(dataset):
+    """Pick the dates and names the scenarios run against."""
+    end = date.fromisoformat(dataset["end"])
+    employees = backend.get_employee_data()
+    return {
+        "end": end,
+        "day": end - timedelta(days=1),
+        "month_start": end - timedelta(days=30),
+        "year_start": end - timedelta(days=365),
+        "position": employees["Position"].mode().iloc[0],
+    }
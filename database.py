@@ -1,57 +1,207 @@
 # database.py
+import os
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 import pandas as pd
+from instrumentation import timed, timer
+from shifts import split_blocks
 
-DATABASE_PATH = "my_database.db"
+DATABASE_PATH = os.environ.get("OVERTIME_DB", "my_database.db")
 
+# Connection pool settings
+POOL_SIZE = 8             # Maximum number of open connections per process
+POOL_TIMEOUT = 10         # Seconds to wait for a free connection
+BUSY_TIMEOUT_MS = 5000    # How long SQLite waits on a locked database
+
+PRAGMAS = {
+    "journal_mode": "WAL",       # Readers never block the writer (and vice versa)
+    "synchronous": "NORMAL",     # Safe with WAL, far fewer fsyncs than FULL
+    "cache_size": -20000,        # ~20 MB page cache per connection
+    "mmap_size": 268435456,      # Memory-map up to 256 MB of the database file
+    "busy_timeout": BUSY_TIMEOUT_MS,
+    "temp_store": "MEMORY",
+}
+
+_idle = queue.LifoQueue()
+_slots = threading.BoundedSemaphore(POOL_SIZE)
+_local = threading.local()
+
+def _open_connection():
+    """Open a new SQLite connection and apply the tuned pragmas."""
+    conn = sqlite3.connect(
+        DATABASE_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+    )
+    for pragma, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma}={value}")
+    return conn
+
+@timed()
 def get_connection():
-    """Return a connection to the SQLite database."""
-    return sqlite3.connect(DATABASE_PATH)
+    """Return a new, unpooled connection to the SQLite database."""
+    return _open_connection()
+
+@contextmanager
+def connection():
+    """
+    Borrow a pooled connection for the duration of a `with` block.
+
+    Nested `connection()` blocks on the same thread reuse the connection
+    that thread already holds, so a backend function calling another one
+    never takes a second slot from the pool.
+    """
+    held = getattr(_local, "conn", None)
+    if held is not None:
+        yield held
+        return
+
+    with timer("database.connection.acquire"):
+        if not _slots.acquire(timeout=POOL_TIMEOUT):
+            raise TimeoutError("Timed out waiting for a free database connection.")
+        try:
+            conn = _idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = _open_connection()
+            except Exception:
+                _slots.release()
+                raise
+
+    _local.conn = conn
+    try:
+        yield conn
+    finally:
+        _local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        _idle.put(conn)
+        _slots.release()
+
+def close_pool():
+    """Close every idle pooled connection (e.g. before replacing the database file)."""
+    while True:
+        try:
+            conn = _idle.get_nowait()
+        except queue.Empty:
+            break
+        conn.close()
+
+# Columns holding calendar dates, stored as ISO "YYYY-MM-DD" text
+DATE_COLUMNS = ["Date", "Hire Date"]
+
+# Natural keys used to match CSV rows against existing rows on import
+NATURAL_KEYS = {
+    "employees": ["Name"],
+    "requests": ["Name", "Date", "Block"],
+    "assignments": ["Name", "Date", "Block", "Assignment Time"],
+}
+# A CSV row is not inserted if its key is already in this other table:
+# an approved request is deleted once its assignment exists, and must not
+# come back as pending when the request log is imported again
+FILLED_BY = {
+    "requests": "assignments",
+}
+INGEST_CHUNKSIZE = 5000
+
+def _normalize_chunk(df):
+    """
+    Convert dates to ISO text and Override to 0/1, and give comma-joined
+    request blocks one row each; missing values become None.
+    """
+    for column in DATE_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column]).dt.strftime("%Y-%m-%d")
+    if "Override" in df.columns:
+        df["Override"] = df["Override"].astype(str).str.lower().isin(["true", "1"]).astype(int)
+    if "Block" in df.columns:
+        df["Block"] = df["Block"].map(split_blocks, na_action="ignore")
+        df = df.explode("Block", ignore_index=True)
+    return df.astype(object).where(df.notna(), None)
+
+def import_csv_to_table(csv_path, table_name, since=None, chunksize=INGEST_CHUNKSIZE):
+    """
+    Upsert a CSV file into the specified table on its natural key (see
+    NATURAL_KEYS), which a unique index makes match at most one row.
+
+    The file is read `chunksize` rows at a time and loaded with executemany
+    into a staging table, then matched in SQL: new keys are inserted, rows
+    whose values changed are updated, identical rows are skipped, and so are
+    requests that already have an assignment (see FILLED_BY). Rows dated
+    before `since` (a date: the table's months up to then are archived and
+    no longer in SQLite) are left out and counted as archived. A key
+    repeated within the file keeps its last row; the earlier ones are
+    counted as duplicates. Existing rows that are not in the file are left
+    alone. The whole import is one transaction. Returns
+    {"inserted": n, "updated": n, "skipped": n, "duplicates": n, "archived": n}.
+    """
+    keys = NATURAL_KEYS[table_name]
+    counts = {"inserted": 0, "updated": 0, "skipped": 0, "duplicates": 0, "archived": 0}
 
-def create_tables():
-    """Create tables if they do not exist."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Create assignments table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS assignments (
-            id INTEGER PRIMARY KEY,
-            assignment_name TEXT,
-            assigned_to TEXT,
-            due_date TEXT
-            -- add more columns as needed
-        )
-    """)
-    
-    # Create employees table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS employees (
-            id INTEGER PRIMARY KEY,
-            name TEXT,
-            role TEXT,
-            department TEXT
-            -- add more columns as needed
-        )
-    """)
-    
-    # Create requests table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS requests (
-            id INTEGER PRIMARY KEY,
-            request_type TEXT,
-            employee_id INTEGER,
-            request_date TEXT
-            -- add more columns as needed
-        )
-    """)
-    
-    conn.commit()
-    conn.close()
-
-def import_csv_to_table(csv_path, table_name):
-    """Import a CSV file into the specified table (overwrites existing data)."""
-    df = pd.read_csv(csv_path)
     conn = get_connection()
-    df.to_sql(table_name, conn, if_exists='replace', index=False)
-    conn.close()
+    try:
+        table_columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+        conn.execute("BEGIN IMMEDIATE")
+        for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+            columns = [c for c in chunk.columns if c in table_columns and c != "id"]
+            chunk = _normalize_chunk(chunk[columns])
+            quoted = ", ".join(f'"{c}"' for c in columns)
+            match = " AND ".join(f't."{k}" IS s."{k}"' for k in keys)
+            changed = " OR ".join(f't."{c}" IS NOT s."{c}"' for c in columns if c not in keys)
+
+            conn.execute(f'CREATE TEMP TABLE _ingest AS SELECT {quoted} FROM "{table_name}" WHERE 0')
+            conn.executemany(
+                f'INSERT INTO _ingest ({quoted}) VALUES ({", ".join("?" * len(columns))})',
+                chunk.values.tolist()
+            )
+            archived = 0
+            if since is not None:
+                archived = conn.execute('DELETE FROM _ingest WHERE "Date" < ?',
+                                        (since.isoformat(),)).rowcount
+            # A key repeated within the file: the last row wins
+            duplicates = conn.execute(f"""
+                DELETE FROM _ingest WHERE rowid NOT IN (
+                    SELECT MAX(rowid) FROM _ingest GROUP BY {", ".join(f'"{k}"' for k in keys)}
+                )
+            """).rowcount
+
+            staged = conn.execute("SELECT COUNT(*) FROM _ingest").fetchone()[0]
+
+            # Counted per staged row, not by the rows the UPDATE touches
+            updated = 0
+            if changed:
+                updated = conn.execute(f"""
+                    SELECT COUNT(*) FROM _ingest AS s
+                    WHERE EXISTS (SELECT 1 FROM "{table_name}" AS t WHERE {match} AND ({changed}))
+                """).fetchone()[0]
+            if updated:
+                conn.execute(f"""
+                    UPDATE "{table_name}" AS t
+                    SET {", ".join(f'"{c}" = s."{c}"' for c in columns if c not in keys)}
+                    FROM _ingest AS s
+                    WHERE {match} AND ({changed})
+                """)
+            filled = ""
+            if table_name in FILLED_BY:
+                filled = f'AND NOT EXISTS (SELECT 1 FROM "{FILLED_BY[table_name]}" AS t WHERE {match})'
+            inserted = conn.execute(f"""
+                INSERT INTO "{table_name}" ({quoted})
+                SELECT {quoted} FROM _ingest AS s
+                WHERE NOT EXISTS (SELECT 1 FROM "{table_name}" AS t WHERE {match}) {filled}
+            """).rowcount
+            conn.execute("DROP TABLE _ingest")
+
+            counts["inserted"] += inserted
+            counts["updated"] += updated
+            counts["duplicates"] += duplicates
+            counts["archived"] += archived
+            counts["skipped"] += staged - inserted - updated
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return counts
@@ -0,0 +1,122 @@
+# directory.py
+"""
+In-memory employee directory for the name pickers: prefix and fuzzy name
+search, lookup by badge (the employees table id) and employees grouped by
+position. Built once per data version and shared by every session.
+"""
+import difflib
+import threading
+import time
+from bisect import bisect_left
+
+import backend
+from instrumentation import timed
+
+# Most matches a search returns (and a picker shows)
+SEARCH_LIMIT = 20
+# How close a fuzzy match has to be (0-1, see difflib.get_close_matches)
+FUZZY_CUTOFF = 0.6
+
+class EmployeeDirectory:
+    """Indexes over one snapshot of the employees table."""
+
+    def __init__(self, employees):
+        employees = employees.sort_values(["Hire Date", "Name"], na_position="last")
+        self._by_name = {}
+        self._by_badge = {}
+        self._by_position = {}
+        tokens = []
+        for badge, name, hire_date, position in zip(
+            employees["id"], employees["Name"], employees["Hire Date"], employees["Position"]
+        ):
+            record = {"id": int(badge), "Name": name, "Hire Date": hire_date, "Position": position}
+            self._by_name[name] = record
+            self._by_badge[int(badge)] = record
+            self._by_position.setdefault(position, []).append(name)
+            # Every word of a name is searchable, so "shin" finds "Tien Shinhan"
+            for word in name.casefold().split():
+                tokens.append((word, name))
+        self._tokens = sorted(tokens)
+        self._folded = {name.casefold(): name for name in self._by_name}
+
+    def __len__(self):
+        return len(self._by_name)
+
+    def names(self):
+        """Return every name, sorted."""
+        return sorted(self._by_name)
+
+    def positions(self):
+        """Return every position held by an employee, sorted."""
+        return sorted(p for p in self._by_position if isinstance(p, str))
+
+    def in_position(self, position):
+        """Return the employees in a position, most senior first."""
+        return list(self._by_position.get(position, []))
+
+    def get(self, name):
+        """Return an employee's record (id, Name, Hire Date, Position), or None."""
+        return self._by_name.get(name)
+
+    def lookup(self, value):
+        """
+        Find one employee by badge ("123" or "#123") or by exact name
+        (case-insensitive). Returns a record or None.
+        """
+        text = str(value).strip()
+        badge = text.lstrip("#")
+        if badge.isdigit():
+            return self._by_badge.get(int(badge))
+        name = self._folded.get(text.casefold())
+        return None if name is None else self._by_name[name]
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """
+        Return up to `limit` names matching `text`: a badge match first, then
+        names with a word starting with it (binary search over the sorted
+        words); only if nothing matches, close fuzzy matches for typos.
+        """
+        text = text.strip()
+        if not text:
+            return []
+        matches = []
+        record = self.lookup(text)
+        if record is not None:
+            matches.append(record["Name"])
+
+        query = text.casefold()
+        first_word = query.split()[0]
+        found = set()
+        i = bisect_left(self._tokens, (first_word,))
+        while i < len(self._tokens) and self._tokens[i][0].startswith(first_word):
+            name = self._tokens[i][1]
+            if query in name.casefold():
+                found.add(name)
+            i += 1
+        # Names starting with the query before names that merely contain it
+        found.difference_update(matches)
+        matches += sorted(found, key=lambda name: (not name.casefold().startswith(query), name))
+
+        if not matches:
+            close = difflib.get_close_matches(query, self._folded, n=limit, cutoff=FUZZY_CUTOFF)
+            matches = [self._folded[folded] for folded in close]
+        return matches[:limit]
+
+_directory = None
+_directory_lock = threading.Lock()
+
+@timed()
+def get_directory():
+    """
+    Return the shared directory, rebuilding it when the data version changes
+    or, like the read cache, after backend.CACHE_TTL_SECONDS (so employees
+    imported by another process, e.g. the nightly setup.py, show up).
+    """
+    global _directory
+    version = backend.data_version()
+    now = time.monotonic()
+    with _directory_lock:
+        if (_directory is None or _directory[0] != version
+                or now - _directory[1] >= backend.CACHE_TTL_SECONDS):
+            _directory = (version, now, EmployeeDirectory(backend.get_employee_data()))
+        return _directory[2]
@@ -0,0 +1,127 @@
+# events.py
+"""
+Append-only change log. Every backend write appends one event per change
+(request added/removed, assignment added, queue rotated, ...) in the same
+transaction, numbered by `seq`. Writes are serialized through the single
+writer thread, so events commit in seq order and a reader asking for
+"everything after N" never misses one.
+
+A snapshot of the live state (the seniority queues, and the pending
+requests and assignments dated from SNAPSHOT_DAYS before the snapshot
+onwards) is stored with the seq it reflects every SNAPSHOT_EVERY events,
+and on demand. A consumer loads the latest snapshot, replays the events
+after it with apply_event(), and from then on only reads new events:
+
+    seq, state = backend.load_live_state()
+    ...
+    events = backend.get_events_since(seq)
+    for event in events.to_dict("records"):
+        apply_event(state, event)
+    seq = events["seq"].max() if not events.empty else seq
+
+Events are never deleted, so the log is also the audit trail (who
+assigned whom, when, and whether it was an override).
+"""
+import json
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+EVENT_COLUMNS = ["seq", "Event Time", "kind", "Name", "Date", "payload"]
+
+# Take a snapshot inside the transaction that writes every Nth event
+SNAPSHOT_EVERY = 5000
+# Days of assignments before the snapshot date kept in a snapshot
+SNAPSHOT_DAYS = 7
+# Snapshots kept; older ones are dropped when a new one is stored
+KEEP_SNAPSHOTS = 3
+
+def log_event(conn, kind, name=None, date=None, payload=None):
+    """
+    Append an event on an open transaction and return its seq.
+
+    Parameters:
+      - kind: (str) What happened, e.g. "assignment_added".
+      - name, date: (str) The employee and ISO date concerned, if any.
+      - payload: (dict) The changed row or other details, stored as JSON.
+    """
+    seq = conn.execute(
+        'INSERT INTO events ("Event Time", kind, "Name", "Date", payload) VALUES (?, ?, ?, ?, ?)',
+        (datetime.now().isoformat(sep=" "), kind, name, date, json.dumps(payload or {}))
+    ).lastrowid
+    if seq % SNAPSHOT_EVERY == 0:
+        take_snapshot(conn)
+    return seq
+
+def _records(conn, sql, params=()):
+    """Rows of a query as dicts, with missing values as None."""
+    df = pd.read_sql_query(sql, conn, params=list(params))
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+def take_snapshot(conn, today=None):
+    """
+    Store the live state as of the latest event on an open transaction and
+    return that seq: both seniority queues, and the pending requests and
+    assignments dated from SNAPSHOT_DAYS before `today` onwards.
+    """
+    seq = conn.execute("SELECT COALESCE(MAX(seq), 0) FROM events").fetchone()[0]
+    since = ((today or date.today()) - timedelta(days=SNAPSHOT_DAYS)).isoformat()
+    state = {
+        "since": since,
+        "requests": _records(
+            conn, 'SELECT id, "Name", "Date", "Block", "Request Time" FROM requests WHERE "Date" >= ?', (since,)
+        ),
+        "assignments": _records(conn, 'SELECT * FROM assignments WHERE "Date" >= ?', (since,)),
+        "queues": _records(conn, 'SELECT queue, "Name", "Position", seq FROM seniority_queue'),
+    }
+    conn.execute(
+        """
+        INSERT INTO event_snapshots (seq, "Snapshot Time", state) VALUES (?, ?, ?)
+        ON CONFLICT (seq) DO UPDATE SET "Snapshot Time" = excluded."Snapshot Time", state = excluded.state
+        """,
+        (seq, datetime.now().isoformat(sep=" "), json.dumps(state))
+    )
+    conn.execute(
+        "DELETE FROM event_snapshots WHERE seq NOT IN (SELECT seq FROM event_snapshots ORDER BY seq DESC LIMIT ?)",
+        (KEEP_SNAPSHOTS,)
+    )
+    return seq
+
+def load_snapshot(conn):
+    """
+    Return (seq, state) for the latest snapshot, or None. The state holds
+    "requests" and "assignments" keyed by id and "queues" keyed by
+    (queue, Name), each mapping to the row as a dict.
+    """
+    row = conn.execute("SELECT seq, state FROM event_snapshots ORDER BY seq DESC LIMIT 1").fetchone()
+    if row is None:
+        return None
+    seq, stored = row
+    stored = json.loads(stored)
+    return seq, {
+        "since": stored["since"],
+        "requests": {r["id"]: r for r in stored["requests"]},
+        "assignments": {a["id"]: a for a in stored["assignments"]},
+        "queues": {(q["queue"], q["Name"]): q for q in stored["queues"]},
+    }
+
+def apply_event(state, event):
+    """
+    Apply one event (a get_events_since() row as a dict) to a state
+    loaded with load_snapshot(). Kinds that only summarize a bulk change
+    ("queues_synced", "imported", "archived") are left to the consumer:
+    they mean the affected table should be re-read (or a new snapshot
+    loaded).
+    """
+    kind, payload = event["kind"], event["payload"]
+    if kind == "request_added":
+        if payload["Date"] >= state["since"]:
+            state["requests"][payload["id"]] = payload
+    elif kind == "request_removed":
+        state["requests"].pop(payload["id"], None)
+    elif kind == "assignment_added":
+        if payload["Date"] >= state["since"]:
+            state["assignments"][payload["id"]] = payload
+    elif kind == "queue_rotated":
+        state["queues"][(payload["queue"], payload["Name"])] = payload
+    return state
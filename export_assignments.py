@@ -0,0 +1,41 @@
+# export_assignments.py
+"""
+Stream assignment history to CSV or Excel without going through Streamlit.
+
+Example:
+    python export_assignments.py --start 2023-01-01 --end 2025-12-31 \
+        --format xlsx --output audit.xlsx --type Mandate
+"""
+import argparse
+from datetime import date
+
+from exports import EXPORT_CHUNKSIZE, stream_csv, stream_excel
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Export assignments for a date range.")
+    parser.add_argument("--start", required=True, type=date.fromisoformat, help="First date (YYYY-MM-DD)")
+    parser.add_argument("--end", required=True, type=date.fromisoformat, help="Last date (YYYY-MM-DD)")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--output", required=True, help="File to write")
+    parser.add_argument("--block", action="append", help="Only this block (repeatable)")
+    parser.add_argument("--line", action="append", help="Only this line (repeatable)")
+    parser.add_argument("--position", action="append", help="Only this position (repeatable)")
+    parser.add_argument("--type", action="append", choices=["Volunteer", "Mandate"],
+                        help="Only this assignment type (repeatable)")
+    parser.add_argument("--chunksize", type=int, default=EXPORT_CHUNKSIZE,
+                        help="Rows read from the database at a time")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.start > args.end:
+        raise SystemExit("--start must be on or before --end")
+
+    filters = dict(blocks=args.block, lines=args.line, positions=args.position, types=args.type)
+    if args.format == "csv":
+        with open(args.output, "w", newline="", encoding="utf-8") as out:
+            rows = stream_csv(out, args.start, args.end, filters, chunksize=args.chunksize)
+    else:
+        rows = stream_excel(args.output, args.start, args.end, filters, chunksize=args.chunksize)
+
+    print(f"Wrote {rows} assignments to {args.output}.")
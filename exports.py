@@ -0,0 +1,161 @@
+# exports.py
+import csv
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from io import BytesIO, StringIO
+
+import xlsxwriter
+
+import archive
+import backend
+import report_pipeline
+from instrumentation import timed
+
+EXPORT_COLUMNS = [
+    "Name", "Date", "Block", "Line", "Position",
+    "Assignment Time", "Assigned By", "Type", "Override"
+]
+
+# Background builds: a small shared pool, results cached per filter key
+EXPORT_WORKERS = 2
+MAX_CACHED_EXPORTS = 32
+EXPORT_TTL_SECONDS = backend.CACHE_TTL_SECONDS
+
+# Streaming exports read and write this many rows at a time
+EXPORT_CHUNKSIZE = 10000
+EXCEL_MAX_ROWS = 1048576  # Rows per worksheet, including the header
+
+_executor = ThreadPoolExecutor(max_workers=EXPORT_WORKERS, thread_name_prefix="export")
+_jobs = OrderedDict()
+_jobs_lock = threading.Lock()
+
+def filter_key(start_date, end_date, blocks, lines, positions, types):
+    """
+    Return a hashable key identifying a report filter set
+    (date range plus the selected blocks/lines/positions/types).
+    """
+    return (
+        start_date.isoformat(), end_date.isoformat(),
+        tuple(sorted(blocks)), tuple(sorted(lines)),
+        tuple(sorted(positions)), tuple(sorted(types)),
+    )
+
+def _unpack_key(key):
+    """Turn a filter key back into (start_date, end_date, filters)."""
+    start, end, blocks, lines, positions, types = key
+    filters = dict(blocks=list(blocks), lines=list(lines),
+                   positions=list(positions), types=list(types))
+    return date.fromisoformat(start), date.fromisoformat(end), filters
+
+def _chunk_rows(chunk):
+    """Return a chunk's rows as lists, with missing values as None."""
+    return chunk.astype(object).where(chunk.notna(), None).values.tolist()
+
+@timed()
+def stream_csv(out, start_date, end_date, filters, chunksize=EXPORT_CHUNKSIZE):
+    """
+    Write filtered assignments as CSV to a text file object, one chunk at a
+    time, and return the number of rows written.
+    `filters` holds blocks/lines/positions/types lists (None means no filter).
+    """
+    writer = csv.writer(out)
+    writer.writerow(EXPORT_COLUMNS)
+    rows = 0
+    for chunk in archive.iter_assignments_between(
+        start_date, end_date, columns=EXPORT_COLUMNS, chunksize=chunksize, **filters
+    ):
+        writer.writerows(_chunk_rows(chunk))
+        rows += len(chunk)
+    return rows
+
+@timed()
+def stream_excel(out, start_date, end_date, filters, chunksize=EXPORT_CHUNKSIZE):
+    """
+    Write filtered assignments to an .xlsx file (path or binary file object)
+    using xlsxwriter's constant_memory mode, which flushes each row as it is
+    written. Continues on a new worksheet when one fills up. Returns the
+    number of rows written.
+    """
+    workbook = xlsxwriter.Workbook(out, {"constant_memory": True})
+    sheets = 0
+    worksheet = None
+    row_index = EXCEL_MAX_ROWS
+    rows = 0
+    try:
+        for chunk in archive.iter_assignments_between(
+            start_date, end_date, columns=EXPORT_COLUMNS, chunksize=chunksize, **filters
+        ):
+            for row in _chunk_rows(chunk):
+                if row_index >= EXCEL_MAX_ROWS:
+                    sheets += 1
+                    name = "FilteredAssignments" if sheets == 1 else f"FilteredAssignments{sheets}"
+                    worksheet = workbook.add_worksheet(name)
+                    worksheet.write_row(0, 0, EXPORT_COLUMNS)
+                    row_index = 1
+                worksheet.write_row(row_index, 0, row)
+                row_index += 1
+            rows += len(chunk)
+        if worksheet is None:
+            workbook.add_worksheet("FilteredAssignments").write_row(0, 0, EXPORT_COLUMNS)
+    finally:
+        workbook.close()
+    return rows
+
+@timed()
+def build_csv(key):
+    """Build the filtered assignments CSV for a filter key."""
+    start_date, end_date, filters = _unpack_key(key)
+    buffer = StringIO(newline="")
+    stream_csv(buffer, start_date, end_date, filters)
+    return buffer.getvalue().encode("utf-8")
+
+@timed()
+def build_excel(key):
+    """Build the filtered assignments Excel workbook for a filter key."""
+    start_date, end_date, filters = _unpack_key(key)
+    excel_buffer = BytesIO()
+    stream_excel(excel_buffer, start_date, end_date, filters)
+    return excel_buffer.getvalue()
+
+@timed()
+def build_pdf(key):
+    """Build the one-page PDF summary report for a filter key."""
+    start_date, end_date, filters = _unpack_key(key)
+    data = report_pipeline.load_report_data(start_date, end_date, filters)
+    return report_pipeline.build_pdf(start_date, end_date, data)
+
+BUILDERS = {
+    "csv": build_csv,
+    "excel": build_excel,
+    "pdf": build_pdf,
+}
+
+def submit_export(kind, key):
+    """
+    Start building an export ("csv", "excel" or "pdf") on the worker pool,
+    or reuse the build already cached for this filter key and data version.
+    Returns a Future that resolves to the file's bytes.
+    """
+    job_key = (kind, key, backend.data_version())
+    now = time.monotonic()
+    with _jobs_lock:
+        job = _jobs.get(job_key)
+        if job is not None:
+            future, started = job
+            failed = future.done() and future.exception() is not None
+            if not failed and now - started < EXPORT_TTL_SECONDS:
+                _jobs.move_to_end(job_key)
+                return future
+        future = _executor.submit(BUILDERS[kind], key)
+        _jobs[job_key] = (future, now)
+        _jobs.move_to_end(job_key)
+        while len(_jobs) > MAX_CACHED_EXPORTS:
+            _jobs.popitem(last=False)
+    return future
+
+def get_export(kind, key):
+    """Return the bytes of an export, building it in the background if needed."""
+    return submit_export(kind, key).result()
@@ -0,0 +1,36 @@
+# admin_panel.py
+import streamlit as st
+import pandas as pd
+import backend
+import instrumentation
+
+def app():
+    st.header("Performance")
+    
+    if not instrumentation.ENABLED:
+        st.info("Timing is turned off (OVERTIME_METRICS=0).")
+        return
+    
+    # Per-function timings for this server process
+    timings = pd.DataFrame(instrumentation.snapshot())
+    if timings.empty:
+        st.info("No calls recorded yet.")
+    else:
+        sort_by = st.selectbox("Sort by", ["p95_ms", "mean_ms", "calls", "rows", "name"], key="admin_sort")
+        timings = timings.sort_values(sort_by, ascending=(sort_by == "name"))
+        st.dataframe(timings.reset_index(drop=True))
+    
+    # Shared read cache
+    st.subheader("Read Cache")
+    stats = backend.cache_stats()
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+    col2.metric("Entries", f"{stats['entries']} / {stats['max_entries']}")
+    col3.metric("Data Version", stats["data_version"])
+    
+    if instrumentation.METRICS_LOG:
+        st.caption(f"Per-call log: {instrumentation.METRICS_LOG}")
+    
+    if st.button("Reset Timings", key="admin_reset"):
+        instrumentation.reset()
+        st.rerun()
@@ -1,52 +1,16 @@
 # coordinator_portal.py
+import hashlib
 import streamlit as st
-import pandas as pd
-import backend  # Assumes backend.py contains save_assignment(), remove_request(), and get_employee_data()
+import backend
+import scheduler
+from directory import get_directory
+from instrumentation import timed
+from shifts import SHIFT_BLOCKS
 from datetime import datetime
 
-# Predefined shift blocks and lines
-shift_blocks = [
-    "7:00 AM - 11:00 AM",
-    "11:00 AM - 3:00 PM",
-    "3:00 PM - 7:00 PM",
-    "7:00 PM - 11:00 PM",
-    "11:00 PM - 3:00 AM",
-    "3:00 AM - 7:00 AM"
-]
+# Predefined lines
 ALL_LINES = ["L21", "L22", "L23", "L24", "L25", "L31", "L32", "L33", "L35", "L36"]
-
-def load_employee_data():
-    """Loads employee data from the database using backend."""
-    return backend.get_employee_data()
-
-def initialize_volunteer_queue():
-    """
-    Initializes the volunteer queue in session_state if not set.
-    Sorted by ascending Hire Date (most senior first).
-    """
-    if "volunteer_queue" not in st.session_state:
-        df = load_employee_data()
-        st.session_state.volunteer_queue = df.sort_values("Hire Date", ascending=True).to_dict("records")
-
-def initialize_mandate_queue():
-    """
-    Initializes the mandate queue in session_state if not set.
-    Sorted by descending Hire Date (most junior first).
-    """
-    if "mandate_queue" not in st.session_state:
-        df = load_employee_data()
-        st.session_state.mandate_queue = df.sort_values("Hire Date", ascending=False).to_dict("records")
-
-def rotate_queue(queue, name):
-    """
-    Rotates the employee with the given name in the queue:
-    removes them from the current position and appends them to the end.
-    """
-    for i, emp in enumerate(queue):
-        if emp["Name"] == name:
-            candidate = queue.pop(i)
-            queue.append(candidate)
-            break
+OWN_POSITION = "Employee's own position"
 
 def auto_rerun():
     try:
@@ -54,8 +18,39 @@ def auto_rerun():
     except Exception:
         st.markdown("<meta http-equiv='refresh' content='2'>", unsafe_allow_html=True)
 
-def app(requests_log):
+def approve_selected(vol_date, selected, chosen_line, chosen_position, inbox_version):
+    """Approve the selected requests in one batch with the chosen line/position."""
+    assignments = [
+        {
+            "Name": row["Name"],
+            "Block": row["Block"],
+            "Line": chosen_line,
+            "Position": row["Position"] if chosen_position == OWN_POSITION else chosen_position,
+            "Type": "Volunteer",
+            "Request": row["id"],
+        }
+        for row in selected.to_dict("records")
+    ]
+    # All or nothing, in one transaction; the key makes a double-click or
+    # rerun return the same assignments
+    request_ids = ",".join(str(r) for r in sorted(selected["id"]))
+    try:
+        backend.save_assignments(
+            vol_date, assignments,
+            idempotency_key="approve-requests-" + hashlib.sha256(request_ids.encode()).hexdigest()[:16]
+        )
+    except ValueError as e:
+        st.error(str(e))
+    else:
+        st.session_state["vol_inbox_version"] = inbox_version + 1
+        st.success(f"Assigned {len(assignments)} volunteers to {chosen_line}.")
+        auto_rerun()
+
+@timed()
+def app():
     st.header("Coordinator Portal")
+    employees = get_directory()
+    positions_list = employees.positions()
     
     # ------------------------------
     # Section 1: Approve Volunteer Requests
@@ -63,81 +58,136 @@ def app(requests_log):
     st.subheader("Approve Volunteer Requests")
     vol_date = st.date_input("Select Date for Requests", datetime.today(), key="vol_date")
     
-    # Ensure the "Date" column is in datetime format before filtering
-    requests_log["Date"] = pd.to_datetime(requests_log["Date"])
-    # Filter rows where the date matches the selected date (compare date parts)
-    requests_filtered = requests_log[requests_log["Date"].dt.date == vol_date]
-    
-    initialize_volunteer_queue()
+    # One page of requests at a time, sorted in the database, so the page
+    # costs the same however many requests are pending
+    request_count = backend.count_requests_for_date(vol_date)
     
-    if requests_filtered.empty:
+    if request_count == 0:
         st.info("No overtime requests for the selected date.")
     else:
-        for i, row in requests_filtered.iterrows():
-            with st.expander(f"{row['Name']} requested {row['Block']}"):
-                st.write(f"**Requested Shift:** {row['Block']}")
-                chosen_line = st.selectbox("Assign Line", ALL_LINES, key=f"vol_line_{i}")
-                positions_list = ["Case Packer", "Operator", "Denester", "Cheese Harp", "Placer"]
-                chosen_position = st.selectbox("Assign Position", positions_list, key=f"vol_pos_{i}")
-                if st.button("Approve and Assign", key=f"vol_assign_{i}"):
-                    candidate_name = row["Name"]
-                    backend.save_assignment(
-                        name=candidate_name,
-                        date=row["Date"],
-                        block=row["Block"],
-                        line=chosen_line,
-                        position=chosen_position,
-                        assignment_type="Volunteer",
-                        override=False
-                    )
-                    # Remove the approved request from the database or the log
-                    backend.remove_request(candidate_name, row["Date"], row["Block"])
-                    st.success(f"{candidate_name} assigned as Volunteer to {chosen_line} - {chosen_position}.")
-                    rotate_queue(st.session_state.volunteer_queue, candidate_name)
-                    auto_rerun()
+        page_count = -(-request_count // backend.REQUEST_PAGE_SIZE)
+        col_sort, col_page = st.columns(2)
+        sort = col_sort.selectbox("Sort Requests By", list(backend.REQUEST_SORTS), key="vol_sort")
+        page = col_page.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        page_requests = backend.get_request_page(vol_date, page - 1, sort=sort)
+        first = (page - 1) * backend.REQUEST_PAGE_SIZE
+        st.caption(f"Requests {first + 1}-{first + len(page_requests)} of {request_count}")
+        
+        inbox = page_requests[["Name", "Block", "Position", "Hire Date", "Request Time"]].copy()
+        inbox.insert(0, "Approve", False)
+        # The version changes after each approval so old checkmarks are dropped
+        inbox_version = st.session_state.get("vol_inbox_version", 0)
+        edited = st.data_editor(
+            inbox,
+            hide_index=True,
+            disabled=["Name", "Block", "Position", "Hire Date", "Request Time"],
+            key=f"vol_inbox_{vol_date}_{sort}_{page}_{inbox_version}"
+        )
+        selected = page_requests[edited["Approve"].to_numpy()]
+        
+        col_line, col_pos = st.columns(2)
+        chosen_line = col_line.selectbox("Assign Line", ALL_LINES, key="vol_line")
+        # Default to each employee's own position
+        chosen_position = col_pos.selectbox(
+            "Assign Position", [OWN_POSITION] + positions_list, key="vol_pos"
+        )
+        if st.button(f"Approve and Assign Selected ({len(selected)})", key="vol_assign", disabled=selected.empty):
+            if chosen_position == OWN_POSITION and selected["Position"].isna().any():
+                st.error("Some selected employees have no position on file; choose a position to assign.")
+            else:
+                approve_selected(vol_date, selected, chosen_line, chosen_position, inbox_version)
     
     # ------------------------------
     # Section 2: Mandate Assignment
     # ------------------------------
     st.subheader("Mandate Assignment")
     mandate_date = st.date_input("Select Date for Mandate", datetime.today(), key="mandate_date")
-    mandate_shift = st.selectbox("Select Shift", shift_blocks, key="mandate_shift")
+    mandate_shift = st.selectbox("Select Shift", SHIFT_BLOCKS, key="mandate_shift")
     mandate_line = st.selectbox("Select Line", ALL_LINES, key="mandate_line")
     
-    initialize_mandate_queue()
+    # Coordinator selects a Position to filter mandate candidates
+    chosen_position_filter = st.selectbox("Select Position for Mandate", positions_list, key="mandate_position_filter")
     
-    # Coordinator selects a Position to filter mandate candidates using database data
-    employee_data = load_employee_data()
-    unique_positions = sorted(employee_data["Position"].unique())
-    chosen_position_filter = st.selectbox("Select Position for Mandate", unique_positions, key="mandate_position_filter")
-    
-    # Filter mandate candidates by chosen position
-    filtered_mandate_candidates = [emp for emp in st.session_state.mandate_queue if emp["Position"] == chosen_position_filter]
-    if not filtered_mandate_candidates:
+    # Mandate candidates for the chosen position, in the shared rotation order
+    # (most junior first); the database moves them to the back once assigned
+    mandate_queue = backend.get_queue("Mandate", chosen_position_filter)
+    if mandate_queue.empty:
         st.info(f"No candidates available for position: {chosen_position_filter}")
     else:
-        candidate_names = [emp["Name"] for emp in filtered_mandate_candidates]
-        selected_candidate = st.selectbox("Select Candidate for Mandate", candidate_names, index=0, key="mandate_candidate")
-        candidate_info = next((emp for emp in filtered_mandate_candidates if emp["Name"] == selected_candidate), None)
-        st.markdown(f"**Candidate Position:** {candidate_info['Position']}")
+        candidate_names = mandate_queue["Name"].tolist()
+        # Rolling overtime hours up to the mandate date, from the hours ledger
+        hours = backend.get_overtime_totals(mandate_date, names=candidate_names).set_index("Name")
+        selected_candidate = st.selectbox(
+            "Select Candidate for Mandate", candidate_names, index=0, key="mandate_candidate",
+            format_func=lambda n: f"{n} ({hours.at[n, 'Total 7d']:g}h 7d / {hours.at[n, 'Total 30d']:g}h 30d / {hours.at[n, 'Total 365d']:g}h 365d)"
+        )
+        st.markdown(f"**Candidate Position:** {chosen_position_filter}")
+        candidate_hours = hours.loc[selected_candidate]
+        st.caption(
+            f"Last 30 days: {candidate_hours['Volunteer 30d']:g}h volunteered, "
+            f"{candidate_hours['Mandate 30d']:g}h mandated. "
+            f"Last 365 days: {candidate_hours['Volunteer 365d']:g}h volunteered, "
+            f"{candidate_hours['Mandate 365d']:g}h mandated."
+        )
         
         # Check if selected candidate is the top candidate (most junior) for this position
-        top_candidate = filtered_mandate_candidates[0]
+        top_candidate = backend.next_up("Mandate", chosen_position_filter)
         override_flag = False
-        if selected_candidate != top_candidate["Name"]:
-            st.warning(f"Warning: {selected_candidate} is not next up (next up is {top_candidate['Name']}). This assignment will be flagged as an override.")
+        if selected_candidate != top_candidate:
+            st.warning(f"Warning: {selected_candidate} is not next up (next up is {top_candidate}). This assignment will be flagged as an override.")
             override_flag = True
         
         if st.button("Confirm Mandate Assignment", key="mandate_confirm"):
-            backend.save_assignment(
-                name=candidate_info["Name"],
-                date=mandate_date,
-                block=mandate_shift,
-                line=mandate_line,
-                position=candidate_info["Position"],
-                assignment_type="Mandate",
-                override=override_flag
-            )
-            st.success(f"Mandated {candidate_info['Name']} to {mandate_line} - {candidate_info['Position']} for shift {mandate_shift}{' (Override)' if override_flag else ''}.")
-            rotate_queue(st.session_state.mandate_queue, candidate_info["Name"])
-            auto_rerun()
+            try:
+                backend.save_assignment(
+                    name=selected_candidate,
+                    date=mandate_date,
+                    block=mandate_shift,
+                    line=mandate_line,
+                    position=chosen_position_filter,
+                    assignment_type="Mandate",
+                    override=override_flag,
+                    idempotency_key=f"mandate-{mandate_date}-{mandate_shift}-{mandate_line}-{selected_candidate}"
+                )
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success(f"Mandated {selected_candidate} to {mandate_line} - {chosen_position_filter} for shift {mandate_shift}{' (Override)' if override_flag else ''}.")
+                auto_rerun()
+    
+    # ------------------------------
+    # Section 3: Auto-schedule a Day
+    # ------------------------------
+    st.subheader("Auto-schedule a Day")
+    auto_date = st.date_input("Select Date to Schedule", datetime.today(), key="auto_date")
+    auto_blocks = st.multiselect("Shifts", SHIFT_BLOCKS, default=SHIFT_BLOCKS, key="auto_blocks")
+    auto_lines = st.multiselect("Lines", ALL_LINES, default=ALL_LINES, key="auto_lines")
+    auto_positions = st.multiselect("Positions to Staff on Each Line", positions_list, key="auto_positions")
+    
+    if st.button("Propose Schedule", key="auto_propose"):
+        slots = scheduler.open_slots(auto_date, scheduler.slots_for(auto_blocks, auto_lines, auto_positions))
+        st.session_state["auto_plan"] = {
+            "date": auto_date,
+            "plan": scheduler.propose(auto_date, slots),
+            "key": scheduler.new_plan_key(),
+        }
+    
+    proposal = st.session_state.get("auto_plan")
+    if proposal is not None and proposal["date"] == auto_date:
+        plan = proposal["plan"]
+        filled = plan["Name"].notna()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Volunteers", int((plan["Type"] == "Volunteer").sum()))
+        col2.metric("Mandates", int((plan["Type"] == "Mandate").sum()))
+        col3.metric("Unfilled", int((~filled).sum()))
+        st.dataframe(plan, hide_index=True)
+        if filled.any() and st.button("Commit Schedule", key="auto_commit"):
+            try:
+                # One transaction; the plan's key makes a double-click harmless
+                assignment_ids = scheduler.commit(auto_date, plan, idempotency_key=proposal["key"])
+            except ValueError as e:
+                st.error(f"{e} Propose the schedule again.")
+            else:
+                del st.session_state["auto_plan"]
+                st.success(f"Saved {len(assignment_ids)} assignments for {auto_date}.")
+                auto_rerun()
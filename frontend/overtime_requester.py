@@ -2,38 +2,43 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import backend
+from directory import get_directory
+from instrumentation import timed
+from shifts import SHIFT_BLOCKS
 
-# Predefined shift blocks
-shift_blocks = [
-    "7:00 AM - 11:00 AM", "11:00 AM - 3:00 PM", "3:00 PM - 7:00 PM",
-    "7:00 PM - 11:00 PM", "11:00 AM - 3:00 AM", "3:00 AM - 7:00 AM"
-]
-
-def app(employee_data):
+@timed()
+def app():
     st.header("Overtime Request Form")
     
-    # Use the passed employee_data DataFrame
-    if employee_data.empty:
+    # Shared employee directory (rebuilt only when the data changes)
+    employees = get_directory()
+    if not len(employees):
         st.error("No employee data found in the database.")
         return
 
-    # Get a sorted list of unique employee names
-    employee_names = sorted(employee_data["Name"].unique())
+    # Search by name or badge; only the matches are sent to the browser
+    query = st.text_input("Search Your Name or Badge #", key="requester_search")
+    matches = employees.search(query)
+    if query and not matches:
+        st.warning("No employee matches that search.")
     
     # Let the user select their name, date, and time blocks
-    name = st.selectbox("Select Your Name", employee_names)
+    name = st.selectbox("Select Your Name", matches,
+                        format_func=lambda n: f"{n} (#{employees.get(n)['id']})")
     date = st.date_input("Date", datetime.today())
-    blocks = st.multiselect("Select Time Blocks", shift_blocks)
+    blocks = st.multiselect("Select Time Blocks", SHIFT_BLOCKS)
     
     if st.button("Submit Request"):
         if name and blocks:
-            # Save the request in the database (ensure backend.save_request is updated accordingly)
-            backend.save_request(name, date, blocks)
-            st.success("Request submitted!")
+            # Save the request in the database (one row per block)
+            try:
+                backend.save_request(name, date, blocks)
+            except ValueError as e:
+                st.error(str(e))
+            else:
+                st.success("Request submitted!")
         else:
             st.warning("Select your name and at least one block.")
 
 if __name__ == "__main__":
-    # For testing standalone, load employee data from the database.
-    emp_data = backend.get_employee_data()
-    app(emp_data)
+    app()
@@ -1,29 +1,34 @@
 # tv_display.py
 import streamlit as st
-import pandas as pd
 from datetime import datetime
+import tv_feed
+from instrumentation import timed
 
-def app(assignments_log, shift_blocks):
+# How often the board checks for new assignments
+REFRESH_SECONDS = 10
+
+@st.fragment(run_every=REFRESH_SECONDS)
+@timed()
+def show_board(display_date, shift_blocks):
+    """
+    Draw the board for a date. Runs as a fragment on a timer, so only this
+    part of the page refreshes; the shared board fetches just the new rows.
+    """
+    board = tv_feed.get_board(display_date)
+    if board.last_id == 0:
+        st.warning("No assignments for selected date.")
+        return
+    for block, block_df in board.blocks(shift_blocks):
+        if not block_df.empty:
+            st.subheader(f"{block}")
+            st.dataframe(block_df)
+        else:
+            st.markdown(f"*No assignments for {block}*")
+
+@timed()
+def app(shift_blocks):
     st.header("TV Display")
     
-    # Ensure the Date column is in datetime format
-    if assignments_log.empty is False and assignments_log["Date"].dtype == "O":
-        assignments_log["Date"] = pd.to_datetime(assignments_log["Date"])
-    
     display_date = st.date_input("Select Date to Display", datetime.today(), key="tv")
     
-    if not assignments_log.empty:
-        # Filter assignments for the selected date (compare only date part)
-        display_df = assignments_log[assignments_log["Date"].dt.date == display_date]
-        if not display_df.empty:
-            for block in shift_blocks:
-                block_df = display_df[display_df["Block"] == block]
-                if not block_df.empty:
-                    st.subheader(f"{block}")
-                    st.dataframe(block_df[["Line", "Name", "Position", "Type"]].reset_index(drop=True))
-                else:
-                    st.markdown(f"*No assignments for {block}*")
-        else:
-            st.warning("No assignments for selected date.")
-    else:
-        st.info("No assignments data available.")
+    show_board(display_date, shift_blocks)
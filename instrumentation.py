@@ -0,0 +1,157 @@
+# instrumentation.py
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Set OVERTIME_METRICS=0 to turn timing off entirely
+ENABLED = os.environ.get("OVERTIME_METRICS", "1") != "0"
+# Path of a JSON-lines log with one record per timed call (off when unset)
+METRICS_LOG = os.environ.get("OVERTIME_METRICS_LOG")
+# Only log calls at least this slow
+METRICS_LOG_MIN_MS = float(os.environ.get("OVERTIME_METRICS_LOG_MIN_MS", "0"))
+# Latency samples kept per name for the percentiles
+LATENCY_SAMPLES = 1024
+
+_stats = {}
+_lock = threading.Lock()
+
+_log = logging.getLogger("overtime.metrics")
+if METRICS_LOG and not _log.handlers:
+    _handler = logging.FileHandler(METRICS_LOG)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    _log.addHandler(_handler)
+    _log.setLevel(logging.INFO)
+    _log.propagate = False
+
+class _Stat:
+    __slots__ = ("calls", "errors", "total_s", "rows", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_s = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=LATENCY_SAMPLES)
+
+def record(name, elapsed, rows=None, error=False):
+    """Record one call of `name` that took `elapsed` seconds."""
+    if not ENABLED:
+        return
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            stat = _stats[name] = _Stat()
+        stat.calls += 1
+        stat.total_s += elapsed
+        stat.samples.append(elapsed)
+        if rows is not None:
+            stat.rows += rows
+        if error:
+            stat.errors += 1
+    if METRICS_LOG and elapsed * 1000 >= METRICS_LOG_MIN_MS:
+        _log.info(json.dumps({
+            "ts": round(time.time(), 3),
+            "name": name,
+            "ms": round(elapsed * 1000, 3),
+            "rows": rows,
+            "error": error,
+            "thread": threading.current_thread().name,
+        }))
+
+def _row_count(result):
+    """Rows in a DataFrame/array result, None for anything else."""
+    shape = getattr(result, "shape", None)
+    return shape[0] if shape else None
+
+@contextmanager
+def timer(name):
+    """Time a `with` block under `name`."""
+    if not ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        record(name, time.perf_counter() - started, error=error)
+
+def timed(name=None):
+    """
+    Decorator recording call count, latency and rows returned for a function.
+    For generator functions the time and rows cover the whole iteration.
+    """
+    def decorate(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+        if not ENABLED:
+            return func
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                rows = 0
+                error = False
+                try:
+                    for item in func(*args, **kwargs):
+                        rows += _row_count(item) or 0
+                        yield item
+                except BaseException:
+                    error = True
+                    raise
+                finally:
+                    record(label, time.perf_counter() - started, rows, error)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                record(label, time.perf_counter() - started, error=True)
+                raise
+            record(label, time.perf_counter() - started, _row_count(result))
+            return result
+        return wrapper
+    return decorate
+
+def _percentile(sorted_samples, fraction):
+    index = min(len(sorted_samples) - 1, int(round(fraction * (len(sorted_samples) - 1))))
+    return sorted_samples[index]
+
+def snapshot():
+    """
+    Return one dict per timed name: calls, errors, rows, mean/p50/p95/max
+    latency in milliseconds (percentiles over the most recent calls).
+    """
+    with _lock:
+        items = [(name, stat.calls, stat.errors, stat.total_s, stat.rows, sorted(stat.samples))
+                 for name, stat in _stats.items()]
+    report = []
+    for name, calls, errors, total_s, rows, samples in sorted(items):
+        report.append({
+            "name": name,
+            "calls": calls,
+            "errors": errors,
+            "rows": rows,
+            "mean_ms": round(total_s / calls * 1000, 3),
+            "p50_ms": round(_percentile(samples, 0.50) * 1000, 3),
+            "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+            "max_ms": round(samples[-1] * 1000, 3),
+        })
+    return report
+
+def reset():
+    """Forget all recorded timings."""
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,161 @@
+# precompute.py
+"""
+Headless precompute of the standard Manager Reports periods (month to
+date, last month, last week) with the default filters, meant to run
+nightly from cron:
+
+    python precompute.py
+
+Each file (PDF, Excel, CSV, chart PNGs) is stored once under its SHA-256 in
+artifacts/objects/, and artifacts/<period>.json records the filter key, a
+fingerprint of the report data and the file hashes. Manager Reports serves
+these files directly while the filters and the data still match, and
+computes everything live otherwise.
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import backend
+import exports
+import report_pipeline
+from instrumentation import timed
+
+ARTIFACT_DIR = os.environ.get("OVERTIME_ARTIFACTS", "artifacts")
+TYPES = ["Volunteer", "Mandate"]
+
+# Artifact name -> file extension
+ARTIFACT_FILES = {
+    "csv": ".csv",
+    "excel": ".xlsx",
+    "pdf": ".pdf",
+    "chart_block": ".png",
+    "chart_line": ".png",
+    "chart_position": ".png",
+    "chart_type": ".png",
+}
+
+def standard_periods(today=None):
+    """Return the precomputed periods as (name, start_date, end_date)."""
+    today = today or date.today()
+    month_start = today.replace(day=1)
+    last_month_end = month_start - timedelta(days=1)
+    last_week_start = today - timedelta(days=today.weekday() + 7)
+    return [
+        ("month_to_date", month_start, today),
+        ("last_month", last_month_end.replace(day=1), last_month_end),
+        ("last_week", last_week_start, last_week_start + timedelta(days=6)),
+    ]
+
+def default_key(start_date, end_date):
+    """The filter key Manager Reports starts with: every value used in the range."""
+    options = backend.get_assignment_filter_options(start_date, end_date)
+    return exports.filter_key(start_date, end_date, options["Block"], options["Line"],
+                              options["Position"], TYPES)
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _object_path(sha256, suffix):
+    return os.path.join(ARTIFACT_DIR, "objects", sha256 + suffix)
+
+def _store(data, suffix):
+    """Store bytes under their content hash (once) and return the hash."""
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = _object_path(sha256, suffix)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return sha256
+
+@timed()
+def precompute_period(name, start_date, end_date):
+    """Build and store every artifact for one period; return its manifest."""
+    key = default_key(start_date, end_date)
+    fingerprint = backend.rollup_fingerprint(start_date, end_date)
+    data = report_pipeline.load_report_data(start_date, end_date, exports._unpack_key(key)[2])
+
+    contents = {"csv": exports.build_csv(key), "excel": exports.build_excel(key)}
+    if data["total_assignments"]:
+        for panel, png in report_pipeline.render_panels(data).items():
+            contents[f"chart_{panel}"] = png
+        contents["pdf"] = report_pipeline.build_pdf(start_date, end_date, data)
+
+    manifest = {
+        "period": name,
+        "start": start_date.isoformat(),
+        "end": end_date.isoformat(),
+        "key": json.loads(json.dumps(key)),
+        "fingerprint": fingerprint,
+        "generated": datetime.now().isoformat(sep=" ", timespec="seconds"),
+        "summary": {
+            "total_assignments": data["total_assignments"],
+            "most_used_position": data["most_used_position"],
+        },
+        "files": {
+            artifact: {"sha256": _store(content, ARTIFACT_FILES[artifact]), "bytes": len(content)}
+            for artifact, content in contents.items()
+        },
+    }
+    _write_atomic(os.path.join(ARTIFACT_DIR, f"{name}.json"),
+                  json.dumps(manifest, indent=2).encode("utf-8"))
+    return manifest
+
+def precompute_all(today=None):
+    """Precompute every standard period; return their manifests."""
+    return [precompute_period(*period) for period in standard_periods(today)]
+
+def load_manifests():
+    """Return the stored manifests (periods never precomputed are skipped)."""
+    manifests = []
+    for name, _, _ in standard_periods():
+        path = os.path.join(ARTIFACT_DIR, f"{name}.json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                manifests.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return manifests
+
+@timed()
+def find_artifacts(key):
+    """
+    Return the manifest precomputed for exactly this filter key, if the
+    report data has not changed since; otherwise None.
+    """
+    wanted = json.loads(json.dumps(key))
+    for manifest in load_manifests():
+        if manifest["key"] != wanted:
+            continue
+        start, end = date.fromisoformat(manifest["start"]), date.fromisoformat(manifest["end"])
+        if manifest["fingerprint"] == backend.rollup_fingerprint(start, end):
+            return manifest
+    return None
+
+def read_artifact(manifest, artifact):
+    """Return a stored artifact's bytes, or None if it is missing or corrupt."""
+    entry = manifest["files"].get(artifact)
+    if entry is None:
+        return None
+    try:
+        with open(_object_path(entry["sha256"], ARTIFACT_FILES[artifact]), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    return data if hashlib.sha256(data).hexdigest() == entry["sha256"] else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute the standard report periods.")
+    parser.add_argument("--date", type=date.fromisoformat, default=None,
+                        help="Compute the periods as of this date (YYYY-MM-DD) instead of today")
+    args = parser.parse_args()
+
+    for manifest in precompute_all(args.date):
+        print(f"{manifest['period']}: {manifest['start']} to {manifest['end']}, "
+              f"{manifest['summary']['total_assignments']} assignments, {len(manifest['files'])} files")
+    backend.shutdown_writer()
@@ -0,0 +1,72 @@
+# query_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+class QueryCache:
+    """
+    Process-wide LRU cache for read results, shared by every session.
+
+    Entries are keyed by query and parameters and tagged with the data
+    version current when their load started. Writes call `bump_version()`,
+    which makes every older entry stale; entries also expire after `ttl`
+    seconds so changes made by other processes are eventually picked up.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for `key`, calling `loader()` on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, loaded_at, value = entry
+                if version == self.version and now - loaded_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            version = self.version
+
+        value = loader()
+
+        with self._lock:
+            # A write that landed while we were loading makes this result stale
+            if version == self.version:
+                self._entries[key] = (version, now, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def bump_version(self):
+        """Invalidate every cached entry after a write."""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "data_version": self.version,
+            }
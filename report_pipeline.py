@@ -0,0 +1,219 @@
+# report_pipeline.py
+"""
+One pipeline for the Manager Reports charts, on screen and in the PDF:
+
+    data = load_report_data(start_date, end_date, filters)   # aggregates, once
+    panels = render_panels(data)                             # PNG per chart
+    pdf = build_pdf(start_date, end_date, data)              # page from the panels
+
+Charts are drawn headlessly on the Agg canvas with standalone Figures (no
+pyplot, so no global figure manager keeps them alive), and each figure is
+cleared as soon as its PNG is written. Rendered panels are memoized by a
+hash of the aggregate they show, so the screen, the PDF and the nightly
+precompute render each distinct chart only once.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+
+import matplotlib.image as mpimg
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+
+import backend
+from instrumentation import timed
+
+# Colors
+color_volunteer = "#e74c3c"  # Red
+color_mandate = "#2ecc71"    # Green
+
+PANELS = ["block", "line", "position", "type"]
+PANEL_DPI = 150
+MAX_CACHED_PANELS = 64
+
+_panels = OrderedDict()
+_panels_lock = threading.Lock()
+
+# ------------------------------------------------------------
+# Aggregates
+# ------------------------------------------------------------
+def counts_by_type(counts, dimension):
+    """
+    Pivot rollup counts (dimension, Type, Count) into a frame with the
+    dimension as index and ["Volunteer", "Mandate"] columns.
+    """
+    df = counts.pivot_table(index=dimension, columns="Type", values="Count",
+                            aggfunc="sum", fill_value=0)
+    for t in ["Volunteer", "Mandate"]:
+        if t not in df.columns:
+            df[t] = 0
+    return df[["Volunteer", "Mandate"]].sort_index()
+
+@timed()
+def load_report_data(start_date, end_date, filters):
+    """
+    Read the report aggregates for a date range and filter set from the
+    rollup: per Block/Line/Position counts by type, type totals, the total
+    and the most used position.
+    """
+    def counts(dimension):
+        return backend.get_rollup_counts(dimension, start_date, end_date, **filters)
+
+    df_pos = counts_by_type(counts("Position"), "Position")
+    type_counts = counts("Type").set_index("Type")["Count"]
+    total_assignments = int(type_counts.sum())
+    return {
+        "df_block": counts_by_type(counts("Block"), "Block"),
+        "df_line": counts_by_type(counts("Line"), "Line"),
+        "df_pos": df_pos,
+        "type_counts": type_counts,
+        "total_assignments": total_assignments,
+        "most_used_position": df_pos.sum(axis=1).idxmax() if total_assignments else "N/A",
+    }
+
+# ------------------------------------------------------------
+# Panels
+# ------------------------------------------------------------
+def _stacked_bars(ax, df):
+    """Draw a labeled Volunteer/Mandate stacked bar chart on an axes."""
+    idx = np.arange(len(df))
+    bottom = np.zeros(len(df))
+    for col, col_color in zip(df.columns, [color_volunteer, color_mandate]):
+        vals = df[col].to_numpy()
+        bars = ax.bar(idx, vals, width=0.5, bottom=bottom, label=col, color=col_color)
+        ax.bar_label(bars, labels=[f"{int(v)}" if v > 0 else "" for v in vals],
+                     label_type="center", fontsize=8, color="black")
+        bottom += vals
+    ax.set_xticks(idx)
+    ax.set_xticklabels(df.index, rotation=20, ha='right')
+
+def _grouped_bars(ax, df):
+    """Draw a labeled side-by-side Volunteer/Mandate bar chart on an axes."""
+    x_vals = np.arange(len(df))
+    width = 0.35
+    ax.bar(x_vals - width/2, df["Volunteer"], width, label="Volunteer", color=color_volunteer)
+    ax.bar(x_vals + width/2, df["Mandate"], width, label="Mandate", color=color_mandate)
+    ax.set_xticks(x_vals)
+    ax.set_xticklabels(df.index, rotation=20, ha='right')
+    for container in ax.containers:
+        ax.bar_label(container, padding=3, color="black")
+
+def _draw_block(fig, df):
+    ax = fig.add_subplot()
+    _grouped_bars(ax, df)
+    ax.set_title("Assignments by Block")
+    ax.legend(loc="upper left", bbox_to_anchor=(1.05, 1))
+
+def _draw_stacked(label):
+    def draw(fig, df):
+        ax = fig.add_subplot()
+        _stacked_bars(ax, df)
+        ax.set_title(f"Assignments by {label}")
+        ax.set_xlabel(label)
+        ax.set_ylabel("Count")
+        ax.legend()
+    return draw
+
+def _draw_type(fig, type_counts):
+    ax = fig.add_subplot()
+    colors = [color_volunteer if t == "Volunteer" else color_mandate for t in type_counts.index]
+    ax.pie(type_counts, labels=type_counts.index, autopct="%1.1f%%", startangle=90, colors=colors)
+    ax.set_title("Volunteer vs Mandate")
+
+# Panel -> (report data key, figure size in inches, draw function)
+PANEL_SPECS = {
+    "block": ("df_block", (9, 4), _draw_block),
+    "line": ("df_line", (8, 3), _draw_stacked("Line")),
+    "position": ("df_pos", (8, 3), _draw_stacked("Position")),
+    "type": ("type_counts", (4, 4), _draw_type),
+}
+
+def _aggregate_hash(panel, aggregate):
+    """Hash of a panel's aggregate (labels and counts), used as its cache key."""
+    hashes = pd.util.hash_pandas_object(aggregate.astype("int64"), index=True)
+    return panel, hashlib.sha256(hashes.to_numpy().tobytes()).hexdigest()
+
+@timed()
+def render_panel(panel, aggregate):
+    """
+    Render one panel to PNG bytes on the Agg canvas. The figure is cleared
+    right after saving, so nothing outlives the call but the bytes.
+    """
+    _, figsize, draw = PANEL_SPECS[panel]
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    try:
+        draw(fig, aggregate)
+        fig.tight_layout()
+        buffer = BytesIO()
+        fig.savefig(buffer, format="png", dpi=PANEL_DPI)
+        return buffer.getvalue()
+    finally:
+        fig.clear()
+
+def panel_png(panel, aggregate):
+    """Return a panel's PNG, rendering it only if this aggregate is new."""
+    key = _aggregate_hash(panel, aggregate)
+    with _panels_lock:
+        png = _panels.get(key)
+        if png is not None:
+            _panels.move_to_end(key)
+            return png
+    png = render_panel(panel, aggregate)
+    with _panels_lock:
+        _panels[key] = png
+        while len(_panels) > MAX_CACHED_PANELS:
+            _panels.popitem(last=False)
+    return png
+
+@timed()
+def render_panels(data):
+    """Return {panel: PNG bytes} for load_report_data() output (see PANELS)."""
+    return {panel: panel_png(panel, data[PANEL_SPECS[panel][0]]) for panel in PANELS}
+
+# ------------------------------------------------------------
+# PDF
+# ------------------------------------------------------------
+@timed()
+def build_pdf(start_date, end_date, data):
+    """
+    Build the one-page PDF summary report: the title and summary, then the
+    four rendered panels placed as images.
+    """
+    panels = render_panels(data)
+    fig = Figure(figsize=(12, 9))
+    FigureCanvasAgg(fig)
+    try:
+        gs = fig.add_gridspec(3, 2, height_ratios=[0.3, 1, 1], hspace=0.05, wspace=0.05,
+                              left=0.02, right=0.98, top=0.98, bottom=0.02)
+
+        # Row 0: Title + Summary
+        ax0 = fig.add_subplot(gs[0, :])
+        ax0.axis('off')
+        metrics_text = (
+            f"Manager Report: {start_date.strftime('%m/%d/%Y')} - {end_date.strftime('%m/%d/%Y')}\n"
+            f"Total Assignments: {data['total_assignments']}\n"
+        )
+        if data["most_used_position"] != "N/A":
+            metrics_text += f"Most Used Position: {data['most_used_position']}"
+        ax0.text(0.5, 0.5, metrics_text, ha='center', va='center', fontsize=11)
+
+        # Rows 1-2: Block, Line / Position, Type
+        for panel, cell in zip(PANELS, [gs[1, 0], gs[1, 1], gs[2, 0], gs[2, 1]]):
+            ax = fig.add_subplot(cell)
+            ax.imshow(mpimg.imread(BytesIO(panels[panel]), format="png"))
+            ax.axis('off')
+
+        pdf_buffer = BytesIO()
+        with PdfPages(pdf_buffer) as pdf:
+            pdf.savefig(fig)
+            d = pdf.infodict()
+            d["Title"] = "Overtime Summary Report"
+            d["Author"] = "Overtime Tracker"
+        return pdf_buffer.getvalue()
+    finally:
+        fig.clear()
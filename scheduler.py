@@ -0,0 +1,140 @@
+# scheduler.py
+"""
+Batch auto-scheduling: staff every open line/position slot of a day in one
+pass. Pending volunteer requests are placed first, in volunteer-queue order;
+whatever is left is mandated from the mandate queue, rotating exactly as the
+one-at-a-time mandate picker does. Employees only fill slots for their own
+position, and never where the write-time schedule checks would refuse them
+(overlapping blocks, too long a stretch, too little rest).
+
+Within a block, every employee of a position can fill every slot of that
+position, so taking candidates strictly in queue order is already a maximum
+matching that respects seniority; the whole plan is built in
+O(slots + requests + queue length) without any database writes.
+"""
+from collections import Counter, defaultdict, deque
+from datetime import timedelta
+from uuid import uuid4
+
+import pandas as pd
+
+import backend
+from instrumentation import timed
+from shifts import BLOCK_MINUTES, block_minutes, find_conflict, interval
+
+PLAN_COLUMNS = ["Block", "Line", "Position", "Name", "Type", "Request"]
+
+# Most blocks one employee is scheduled for in a day (existing assignments included)
+MAX_BLOCKS_PER_DAY = 2
+
+def slots_for(blocks, lines, positions):
+    """Return one (block, line, position) slot per combination, in block order."""
+    return [(block, line, position) for block in blocks for line in lines for position in positions]
+
+def open_slots(plan_date, slots):
+    """Drop the slots already covered by an assignment on the date."""
+    taken = backend.get_assignments_for_date(plan_date, columns=["Block", "Line", "Position"])
+    covered = Counter(zip(taken["Block"], taken["Line"], taken["Position"]))
+    remaining = []
+    for slot in slots:
+        if covered[slot]:
+            covered[slot] -= 1
+        else:
+            remaining.append(slot)
+    return remaining
+
+@timed()
+def propose(plan_date, slots, max_blocks=MAX_BLOCKS_PER_DAY):
+    """
+    Build a proposed assignment set for a date.
+
+    Parameters:
+      - plan_date: (datetime.date) The day to staff.
+      - slots: (list) Open (block, line, position) slots, blocks in shift order.
+      - max_blocks: (int) Most blocks any employee may work that day.
+
+    Returns a DataFrame with one row per slot (PLAN_COLUMNS). "Name" is None
+    where nobody could be found; "Request" holds the id of the volunteer
+    request a row fills.
+    """
+    slots = list(slots)
+    # Everyone's assigned blocks around the date, as absolute intervals
+    existing = backend.get_assignments_between(
+        plan_date - timedelta(days=1), plan_date + timedelta(days=1), columns=["Name", "Date", "Block"]
+    )
+    scheduled = defaultdict(list)
+    worked = Counter()
+    for name, day, block in zip(existing["Name"], existing["Date"], existing["Block"]):
+        if block in BLOCK_MINUTES:
+            scheduled[name].append(interval(day, *BLOCK_MINUTES[block]))
+        if day.date() == plan_date:
+            worked[name] += 1
+    block_interval = {block: interval(plan_date, *block_minutes(block)) for block, _, _ in slots}
+
+    # Slot indexes grouped by (block, position), blocks in the order given
+    groups = defaultdict(list)
+    for index, (block, _, position) in enumerate(slots):
+        groups[(block, position)].append(index)
+    plan = [[block, line, position, None, None, None] for block, line, position in slots]
+
+    def place(index, name, assignment_type, request_id=None):
+        plan[index][3:] = [name, assignment_type, request_id]
+        scheduled[name].append(block_interval[plan[index][0]])
+        worked[name] += 1
+
+    def available(name, block):
+        return worked[name] < max_blocks and find_conflict(scheduled[name], block_interval[block]) is None
+
+    # Pass 1: volunteers for each block/position, in volunteer-queue order
+    volunteer_queue = backend.get_queue("Volunteer")
+    rank = {name: i for i, name in enumerate(volunteer_queue["Name"])}
+    position_of = dict(zip(volunteer_queue["Name"], volunteer_queue["Position"]))
+    requests = backend.get_requests_for_date(plan_date, columns=["id", "Name", "Block"])
+    volunteers = defaultdict(list)
+    for request_id, name, block in zip(requests["id"], requests["Name"], requests["Block"]):
+        if name in rank:
+            volunteers[(block, position_of[name])].append((rank[name], name, int(request_id)))
+    for key, indexes in groups.items():
+        candidates = sorted(volunteers.get(key, []))
+        open_indexes = deque(indexes)
+        for _, name, request_id in candidates:
+            if not open_indexes:
+                break
+            if available(name, key[0]):
+                place(open_indexes.popleft(), name, "Volunteer", request_id)
+
+    # Pass 2: mandate the rest; whoever is mandated goes to the back of the queue
+    mandate_queue = backend.get_queue("Mandate")
+    rotation = defaultdict(deque)
+    for name, position in zip(mandate_queue["Name"], mandate_queue["Position"]):
+        rotation[position].append(name)
+    for (block, position), indexes in groups.items():
+        queue = rotation[position]
+        for index in indexes:
+            if plan[index][3] is not None:
+                continue
+            # Take the first available employee; anyone skipped keeps their place
+            for position_in_queue, name in enumerate(queue):
+                if available(name, block):
+                    del queue[position_in_queue]
+                    queue.append(name)
+                    place(index, name, "Mandate")
+                    break
+
+    df = pd.DataFrame(plan, columns=PLAN_COLUMNS)
+    df["Request"] = df["Request"].astype("Int64")
+    return df
+
+def new_plan_key():
+    """Return an idempotency key for committing one proposed plan."""
+    return f"auto-schedule-{uuid4().hex}"
+
+@timed()
+def commit(plan_date, plan, idempotency_key=None, assigned_by="Coordinator"):
+    """
+    Save the filled rows of a proposed plan in one transaction and return
+    the assignment ids (see backend.save_assignments).
+    """
+    filled = plan[plan["Name"].notna()]
+    return backend.save_assignments(plan_date, filled.to_dict("records"),
+                                    assigned_by=assigned_by, idempotency_key=idempotency_key)
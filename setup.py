@@ -1,14 +1,388 @@
 # setup.py
-from database import create_tables, import_csv_to_table
+from archive import ARCHIVED_TABLES, live_since
+from database import get_connection, import_csv_to_table
+from backend import (log_import, rebuild_assignment_rollup, rebuild_overtime_ledger,
+                     snapshot_state, sync_seniority_queues)
+from events import take_snapshot
+from shifts import LEGACY_BLOCKS, SHIFT_BLOCKS, block_minutes, split_blocks
+
+LEGACY_COLUMNS = {
+    "employees": ["Name", "Hire Date", "Position"],
+    "requests": ["Name", "Date", "Block", "Request Time"],
+    "assignments": [
+        "Name", "Date", "Block", "Line", "Position",
+        "Assignment Time", "Assigned By", "Type", "Override"
+    ],
+}
+
+def _table_columns(conn, table_name):
+    """Return the column names of a table (empty if it does not exist)."""
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+
+def _initial_schema(conn):
+    """
+    Migration 1: typed employees/requests/assignments tables with indexes.
+
+    Tables left behind by the old `to_sql(if_exists='replace')` import are
+    copied into the new schema (dates normalized to ISO format); the unused
+    placeholder tables from the original `create_tables()` are dropped.
+    """
+    legacy = []
+    for table_name, columns in LEGACY_COLUMNS.items():
+        existing = _table_columns(conn, table_name)
+        if not existing:
+            continue
+        if set(columns) <= set(existing):
+            conn.execute(f'ALTER TABLE "{table_name}" RENAME TO "{table_name}_legacy"')
+            legacy.append(table_name)
+        else:
+            conn.execute(f'DROP TABLE "{table_name}"')
+
+    conn.execute("""
+        CREATE TABLE employees (
+            id INTEGER PRIMARY KEY,
+            "Name" TEXT NOT NULL,
+            "Hire Date" TEXT CHECK ("Hire Date" IS NULL OR "Hire Date" = date("Hire Date")),
+            "Position" TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE requests (
+            id INTEGER PRIMARY KEY,
+            "Name" TEXT NOT NULL,
+            "Date" TEXT NOT NULL CHECK ("Date" = date("Date")),
+            "Block" TEXT NOT NULL,
+            "Request Time" TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE assignments (
+            id INTEGER PRIMARY KEY,
+            "Name" TEXT NOT NULL,
+            "Date" TEXT NOT NULL CHECK ("Date" = date("Date")),
+            "Block" TEXT NOT NULL,
+            "Line" TEXT,
+            "Position" TEXT,
+            "Assignment Time" TEXT,
+            "Assigned By" TEXT,
+            "Type" TEXT NOT NULL CHECK ("Type" IN ('Volunteer', 'Mandate')),
+            "Override" INTEGER NOT NULL DEFAULT 0 CHECK ("Override" IN (0, 1))
+        )
+    """)
+
+    # Every tab filters by date (and block/name/type); index those paths
+    conn.execute('CREATE UNIQUE INDEX idx_employees_name ON employees ("Name")')
+    conn.execute('CREATE INDEX idx_requests_date_block ON requests ("Date", "Block")')
+    conn.execute('CREATE INDEX idx_requests_name_date ON requests ("Name", "Date")')
+    conn.execute('CREATE INDEX idx_assignments_date_block ON assignments ("Date", "Block")')
+    conn.execute('CREATE INDEX idx_assignments_name_date ON assignments ("Name", "Date")')
+    conn.execute('CREATE INDEX idx_assignments_type_date ON assignments ("Type", "Date")')
+
+    if "employees" in legacy:
+        conn.execute("""
+            INSERT INTO employees ("Name", "Hire Date", "Position")
+            SELECT "Name", date("Hire Date"), "Position" FROM employees_legacy
+        """)
+    if "requests" in legacy:
+        conn.execute("""
+            INSERT INTO requests ("Name", "Date", "Block", "Request Time")
+            SELECT "Name", date("Date"), "Block", "Request Time" FROM requests_legacy
+        """)
+    if "assignments" in legacy:
+        conn.execute("""
+            INSERT INTO assignments ("Name", "Date", "Block", "Line", "Position",
+                                     "Assignment Time", "Assigned By", "Type", "Override")
+            SELECT "Name", date("Date"), "Block", "Line", "Position",
+                   "Assignment Time", "Assigned By", "Type",
+                   CASE WHEN "Override" IN (1, '1', 'True', 'true') THEN 1 ELSE 0 END
+            FROM assignments_legacy
+        """)
+    for table_name in legacy:
+        conn.execute(f'DROP TABLE "{table_name}_legacy"')
+
+def _idempotency_keys(conn):
+    """Migration 2: remember which write each idempotency key produced."""
+    conn.execute("""
+        CREATE TABLE idempotency_keys (
+            "key" TEXT PRIMARY KEY,
+            assignment_id INTEGER,
+            created TEXT NOT NULL
+        )
+    """)
+
+def _seniority_queues(conn):
+    """
+    Migration 3: shared volunteer/mandate rotation order per position.
+
+    `seq` orders each (queue, Position); the unique index makes "next up"
+    and "back of the queue" single index seeks. Seeded from employees:
+    the volunteer queue most senior first, the mandate queue most junior first.
+    """
+    conn.execute("""
+        CREATE TABLE seniority_queue (
+            queue TEXT NOT NULL CHECK (queue IN ('Volunteer', 'Mandate')),
+            "Name" TEXT NOT NULL,
+            "Position" TEXT,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (queue, "Name")
+        )
+    """)
+    conn.execute('CREATE UNIQUE INDEX idx_queue_order ON seniority_queue (queue, "Position", seq)')
+    for queue, direction in [("Volunteer", "ASC"), ("Mandate", "DESC")]:
+        conn.execute(f"""
+            INSERT INTO seniority_queue (queue, "Name", "Position", seq)
+            SELECT ?, "Name", "Position",
+                   ROW_NUMBER() OVER (ORDER BY "Hire Date" {direction}, "Name")
+            FROM employees
+        """, (queue,))
+
+def _assignment_rollup(conn):
+    """
+    Migration 4: daily assignment counts by Block/Line/Position/Type.
+
+    Maintained incrementally by every assignment write and rebuildable with
+    backend.rebuild_assignment_rollup(); Manager Reports aggregates this
+    table instead of the raw assignments.
+    """
+    conn.execute("""
+        CREATE TABLE assignment_rollup (
+            "Date" TEXT NOT NULL,
+            "Block" TEXT NOT NULL,
+            "Line" TEXT NOT NULL,
+            "Position" TEXT NOT NULL,
+            "Type" TEXT NOT NULL,
+            "Count" INTEGER NOT NULL,
+            PRIMARY KEY ("Date", "Block", "Line", "Position", "Type")
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        INSERT INTO assignment_rollup ("Date", "Block", "Line", "Position", "Type", "Count")
+        SELECT "Date", "Block", COALESCE("Line", ''), COALESCE("Position", ''), "Type", COUNT(*)
+        FROM assignments
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+def _shift_blocks(conn):
+    """
+    Migration 5: canonical shift blocks, one request row per block.
+
+    shift_blocks holds each block's start/end in minutes from midnight
+    (end > 1440 when it crosses midnight), so schedule checks join on it
+    instead of parsing labels. Comma-joined request rows are split up,
+    mislabelled blocks corrected, duplicate requests dropped, and a unique
+    index keeps one request per employee, date and block.
+    """
+    conn.execute("""
+        CREATE TABLE shift_blocks (
+            "Block" TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            start_minute INTEGER NOT NULL,
+            end_minute INTEGER NOT NULL CHECK (end_minute > start_minute)
+        ) WITHOUT ROWID
+    """)
+    conn.executemany(
+        'INSERT INTO shift_blocks ("Block", seq, start_minute, end_minute) VALUES (?, ?, ?, ?)',
+        [(block, seq, *block_minutes(block)) for seq, block in enumerate(SHIFT_BLOCKS, start=1)]
+    )
+
+    for wrong, right in LEGACY_BLOCKS.items():
+        for table_name in ["requests", "assignments"]:
+            conn.execute(f'UPDATE {table_name} SET "Block" = ? WHERE "Block" = ?', (right, wrong))
+
+    joined = conn.execute("""
+        SELECT id, "Name", "Date", "Block", "Request Time" FROM requests WHERE "Block" LIKE '%, %'
+    """).fetchall()
+    for request_id, name, date, blocks, request_time in joined:
+        conn.execute("DELETE FROM requests WHERE id = ?", (request_id,))
+        conn.executemany(
+            'INSERT INTO requests ("Name", "Date", "Block", "Request Time") VALUES (?, ?, ?, ?)',
+            [(name, date, block, request_time) for block in split_blocks(blocks)]
+        )
+    conn.execute("""
+        DELETE FROM requests WHERE id NOT IN (
+            SELECT MIN(id) FROM requests GROUP BY "Name", "Date", "Block"
+        )
+    """)
+    conn.execute('DROP INDEX idx_requests_name_date')
+    conn.execute('CREATE UNIQUE INDEX idx_requests_name_date_block ON requests ("Name", "Date", "Block")')
+
+    # The rollup is keyed by block label too
+    conn.execute("DELETE FROM assignment_rollup")
+    conn.execute("""
+        INSERT INTO assignment_rollup ("Date", "Block", "Line", "Position", "Type", "Count")
+        SELECT "Date", "Block", COALESCE("Line", ''), COALESCE("Position", ''), "Type", COUNT(*)
+        FROM assignments
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+
+def _overtime_ledger(conn):
+    """
+    Migration 6: overtime hours per employee, day and type.
+
+    Maintained in the same transaction as every assignment write (and
+    rebuildable with backend.rebuild_overtime_ledger()). The primary key
+    makes an employee's rolling 7/30/365-day totals an index range scan;
+    the date index serves the all-employee totals.
+    """
+    conn.execute("""
+        CREATE TABLE overtime_ledger (
+            "Name" TEXT NOT NULL,
+            "Date" TEXT NOT NULL,
+            "Type" TEXT NOT NULL,
+            "Hours" REAL NOT NULL,
+            PRIMARY KEY ("Name", "Date", "Type")
+        ) WITHOUT ROWID
+    """)
+    conn.execute('CREATE INDEX idx_overtime_ledger_date ON overtime_ledger ("Date")')
+    conn.execute("""
+        INSERT INTO overtime_ledger ("Name", "Date", "Type", "Hours")
+        SELECT a."Name", a."Date", a."Type", SUM(b.end_minute - b.start_minute) / 60.0
+        FROM assignments a JOIN shift_blocks b ON b."Block" = a."Block"
+        GROUP BY 1, 2, 3
+    """)
+
+def _event_log(conn):
+    """
+    Migration 7: append-only change log (see events.py) and its snapshots.
+
+    AUTOINCREMENT keeps seq strictly increasing, even after the newest
+    events are rolled back. The first snapshot (seq 0) captures the state
+    the log starts from.
+    """
+    conn.execute("""
+        CREATE TABLE events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            "Event Time" TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            "Name" TEXT,
+            "Date" TEXT,
+            payload TEXT NOT NULL
+        )
+    """)
+    conn.execute('CREATE INDEX idx_events_kind_date ON events (kind, "Date")')
+    conn.execute("""
+        CREATE TABLE event_snapshots (
+            seq INTEGER PRIMARY KEY,
+            "Snapshot Time" TEXT NOT NULL,
+            state TEXT NOT NULL
+        )
+    """)
+    take_snapshot(conn)
+
+def _assignment_key(conn):
+    """
+    Migration 8: one assignment per employee, date, block and assignment time.
+
+    Several assignments can share an employee, date and block (the legacy
+    log has a volunteer and a mandate row in one block), so the CSV upsert
+    matches on the assignment time too; the unique index gives every
+    staged row a single target. Exact repeats of that key are dropped,
+    and taken out of the rollup and hours ledger with them.
+    """
+    conn.execute("""
+        CREATE TEMP TABLE _repeated AS
+        SELECT a.id, a."Name", a."Date", a."Block", COALESCE(a."Line", '') AS "Line",
+               COALESCE(a."Position", '') AS "Position", a."Type",
+               (b.end_minute - b.start_minute) / 60.0 AS "Hours"
+        FROM assignments a LEFT JOIN shift_blocks b ON b."Block" = a."Block"
+        WHERE a.id NOT IN (
+            SELECT MAX(id) FROM assignments GROUP BY "Name", "Date", "Block", "Assignment Time"
+        )
+    """)
+    conn.execute("""
+        UPDATE assignment_rollup AS r SET "Count" = r."Count" - d.n
+        FROM (SELECT "Date", "Block", "Line", "Position", "Type", COUNT(*) AS n
+              FROM _repeated GROUP BY 1, 2, 3, 4, 5) AS d
+        WHERE r."Date" = d."Date" AND r."Block" = d."Block" AND r."Line" = d."Line"
+          AND r."Position" = d."Position" AND r."Type" = d."Type"
+    """)
+    conn.execute('DELETE FROM assignment_rollup WHERE "Count" <= 0')
+    conn.execute("""
+        UPDATE overtime_ledger AS l SET "Hours" = l."Hours" - d.hours
+        FROM (SELECT "Name", "Date", "Type", SUM("Hours") AS hours
+              FROM _repeated GROUP BY 1, 2, 3) AS d
+        WHERE l."Name" = d."Name" AND l."Date" = d."Date" AND l."Type" = d."Type"
+    """)
+    conn.execute('DELETE FROM overtime_ledger WHERE "Hours" <= 0')
+    repeated = conn.execute("DELETE FROM assignments WHERE id IN (SELECT id FROM _repeated)").rowcount
+    conn.execute("DROP TABLE _repeated")
+    if repeated:
+        take_snapshot(conn)
+    conn.execute("""
+        CREATE UNIQUE INDEX idx_assignments_key
+        ON assignments ("Name", "Date", "Block", "Assignment Time")
+    """)
+
+# Ordered list of schema migrations. The database's `PRAGMA user_version`
+# records how many have been applied; only append to this list.
+MIGRATIONS = [
+    _initial_schema,
+    _idempotency_keys,
+    _seniority_queues,
+    _assignment_rollup,
+    _shift_blocks,
+    _overtime_ledger,
+    _event_log,
+    _assignment_key,
+]
+
+def migrate(conn=None):
+    """
+    Apply any pending migrations, each in its own transaction.
+    Returns the schema version the database ends up at.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, step in enumerate(MIGRATIONS, start=1):
+            if number <= version:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            version = number
+        return version
+    finally:
+        if own_conn:
+            conn.close()
 
 if __name__ == "__main__":
-    # Create the necessary tables
-    create_tables()
-    
-    # Import CSV files into the database tables.
+    # Bring the schema up to date
+    version = migrate()
+    print(f"Schema at version {version}.")
+
+    # Upsert CSV files into the database tables (existing rows are kept;
+    # rows of archived months are not brought back into SQLite).
     # Adjust the CSV file paths if they are in a different directory.
-    import_csv_to_table("assignments_log.csv", "assignments")
-    import_csv_to_table("employee_data.csv", "employees")
-    import_csv_to_table("requests_log.csv", "requests")
-    
+    for csv_path, table_name in [
+        ("assignments_log.csv", "assignments"),
+        ("employee_data.csv", "employees"),
+        ("requests_log.csv", "requests"),
+    ]:
+        since = live_since(table_name) if table_name in ARCHIVED_TABLES else None
+        counts = import_csv_to_table(csv_path, table_name, since)
+        log_import(table_name, counts)
+        print(f"{table_name}: {counts['inserted']} inserted, {counts['updated']} updated, "
+              f"{counts['skipped']} skipped, {counts['duplicates']} duplicates in the file, "
+              f"{counts['archived']} in archived months")
+
+    # Put new hires into the seniority queues, drop departed employees
+    sync_seniority_queues()
+
+    # The import bypasses the incremental report rollup and hours ledger, so
+    # rebuild them; archived months are left as they are
+    since = live_since()
+    rebuild_assignment_rollup(since)
+    rebuild_overtime_ledger(since)
+
+    # Incremental consumers start over from a snapshot after a bulk load
+    snapshot_state()
+
     print("Database setup complete.")
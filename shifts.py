@@ -0,0 +1,111 @@
+# shifts.py
+"""
+The canonical shift blocks and the interval arithmetic behind the
+double-booking and rest-period checks.
+
+Blocks are kept as minutes from midnight; a block that crosses midnight
+(e.g. "11:00 PM - 3:00 AM") ends after 1440. Placed on a calendar day they
+become absolute intervals (minutes since day 1 of the proleptic calendar),
+so blocks on neighbouring days compare directly.
+"""
+from datetime import date as date_type, datetime
+
+MINUTES_PER_DAY = 24 * 60
+
+# Every block the plant schedules, in the order of the working day
+SHIFT_BLOCKS = [
+    "7:00 AM - 11:00 AM",
+    "11:00 AM - 3:00 PM",
+    "3:00 PM - 7:00 PM",
+    "7:00 PM - 11:00 PM",
+    "11:00 PM - 3:00 AM",
+    "3:00 AM - 7:00 AM",
+]
+
+# Labels written by older versions of the app, and the block they meant
+LEGACY_BLOCKS = {"11:00 AM - 3:00 AM": "11:00 PM - 3:00 AM"}
+
+# Longest stretch of back-to-back blocks one employee may work
+MAX_CONTINUOUS_MINUTES = 16 * 60
+# Shortest break between two separate stretches of work
+MIN_REST_MINUTES = 8 * 60
+
+class ScheduleConflict(ValueError):
+    """A write would double-book an employee or break the rest-period rules."""
+
+def _clock_minutes(text):
+    clock = datetime.strptime(text.strip(), "%I:%M %p")
+    return clock.hour * 60 + clock.minute
+
+def parse_block(label):
+    """Return (start, end) minutes from midnight for a label like "7:00 AM - 11:00 AM"."""
+    start_text, end_text = label.split(" - ")
+    start, end = _clock_minutes(start_text), _clock_minutes(end_text)
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+BLOCK_MINUTES = {label: parse_block(label) for label in SHIFT_BLOCKS}
+
+def split_blocks(value):
+    """
+    Split a stored Block value into canonical labels: older versions joined
+    a request's blocks with commas and used some legacy labels.
+    """
+    return [LEGACY_BLOCKS.get(block.strip(), block.strip()) for block in value.split(",")]
+
+def block_minutes(label):
+    """Return (start, end) minutes for a block, raising ValueError for an unknown one."""
+    try:
+        return BLOCK_MINUTES[label]
+    except KeyError:
+        raise ValueError(f"Unknown shift block: {label!r}") from None
+
+def block_sort_key(label):
+    """Sort key ordering block labels by start time (unparseable labels last)."""
+    try:
+        return parse_block(label)[0]
+    except ValueError:
+        return MINUTES_PER_DAY
+
+def interval(day, start, end):
+    """Place a block's (start, end) minutes on a calendar day."""
+    if isinstance(day, str):
+        day = date_type.fromisoformat(day[:10])
+    elif isinstance(day, datetime):
+        day = day.date()
+    offset = day.toordinal() * MINUTES_PER_DAY
+    return offset + start, offset + end
+
+def find_conflict(existing, new, max_continuous=MAX_CONTINUOUS_MINUTES, min_rest=MIN_REST_MINUTES):
+    """
+    Check a new work interval against an employee's existing intervals
+    (absolute minutes). Return a description of the first rule it breaks,
+    or None: overlapping an existing block, making a back-to-back stretch
+    longer than `max_continuous`, or leaving less than `min_rest` between
+    stretches.
+    """
+    new_start, new_end = new
+    for start, end in existing:
+        if start < new_end and new_start < end:
+            return "overlaps a block they are already scheduled for"
+
+    # Merge the new block with the blocks it touches into one stretch
+    stretch_start, stretch_end = new_start, new_end
+    others = sorted(existing)
+    merged = True
+    while merged:
+        merged = False
+        for start, end in others:
+            if end == stretch_start or start == stretch_end:
+                stretch_start, stretch_end = min(stretch_start, start), max(stretch_end, end)
+                merged = True
+        others = [(s, e) for s, e in others if not (stretch_start <= s and e <= stretch_end)]
+    if stretch_end - stretch_start > max_continuous:
+        return f"would work more than {max_continuous // 60} hours in a row"
+
+    for start, end in others:
+        gap = start - stretch_end if start >= stretch_end else stretch_start - end
+        if gap < min_rest:
+            return f"would have less than {min_rest // 60} hours of rest between shifts"
+    return None
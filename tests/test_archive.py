@@ -0,0 +1,41 @@
+# tests/test_archive.py
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_FILES = ["assignments_log.csv", "employee_data.csv", "requests_log.csv"]
+
+def _run(script, *args, cwd):
+    env = dict(os.environ, OVERTIME_DB=os.path.join(cwd, "test.db"),
+               OVERTIME_ARCHIVE=os.path.join(cwd, "archive"), PYTHONPATH=ROOT)
+    subprocess.run([sys.executable, os.path.join(ROOT, script), *args],
+                   cwd=cwd, env=env, check=True, capture_output=True)
+
+def _counts(cwd):
+    conn = sqlite3.connect(os.path.join(cwd, "test.db"))
+    try:
+        return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ["assignments", "requests"]}
+    finally:
+        conn.close()
+
+def test_setup_after_archive_keeps_archived_rows_out(tmp_path):
+    cwd = str(tmp_path)
+    for name in CSV_FILES:
+        shutil.copy(os.path.join(ROOT, name), cwd)
+
+    _run("setup.py", cwd=cwd)
+    assert _counts(cwd)["assignments"] > 0
+    # The shipped logs are from 2025, so every month of them is closed
+    _run("archive.py", "--keep-months", "2", cwd=cwd)
+    assert _counts(cwd) == {"assignments": 0, "requests": 0}
+
+    _run("setup.py", cwd=cwd)
+    assert _counts(cwd) == {"assignments": 0, "requests": 0}
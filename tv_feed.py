@@ -0,0 +1,94 @@
+# tv_feed.py
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+import backend
+from instrumentation import timed
+from shifts import block_sort_key
+
+BOARD_COLUMNS = ["id", "Block", "Line", "Name", "Position", "Type"]
+DISPLAY_COLUMNS = ["Line", "Name", "Position", "Type"]
+
+# However many screens are watching, the database is polled at most this often
+MIN_POLL_SECONDS = 2
+MAX_BOARDS = 4
+
+class TVBoard:
+    """
+    One day's assignments grouped by block, kept in memory and updated by
+    delta polling: each refresh only fetches rows with an id above the
+    last one seen. `version` increases whenever new rows arrive.
+    """
+
+    def __init__(self, board_date):
+        self.board_date = board_date
+        self.version = 0
+        self.last_id = 0
+        self._by_block = {}
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+
+    @timed()
+    def refresh(self, force=False):
+        """Fetch assignments newer than the last seen id; return True if any arrived."""
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._last_poll < MIN_POLL_SECONDS:
+                return False
+            self._last_poll = now
+            new_rows = backend.get_assignments_since(self.board_date, self.last_id, columns=BOARD_COLUMNS)
+            if new_rows.empty:
+                return False
+            for block, rows in new_rows.groupby("Block", sort=False):
+                rows = rows[DISPLAY_COLUMNS]
+                current = self._by_block.get(block)
+                self._by_block[block] = rows if current is None else pd.concat([current, rows])
+            self.last_id = int(new_rows["id"].max())
+            self.version += 1
+            return True
+
+    def blocks(self, shift_blocks=None):
+        """
+        Return (block, DataFrame) pairs for display: the given shift blocks
+        in order (empty frames where nothing is assigned), followed by any
+        other blocks on the board by start time.
+        """
+        with self._lock:
+            by_block = dict(self._by_block)
+        order = list(shift_blocks or [])
+        order += sorted((b for b in by_block if b not in order), key=block_sort_key)
+        empty = pd.DataFrame(columns=DISPLAY_COLUMNS)
+        return [(block, by_block.get(block, empty).reset_index(drop=True)) for block in order]
+
+    def to_dict(self, shift_blocks=None):
+        """Return the board as plain JSON-serializable data."""
+        return {
+            "date": self.board_date.isoformat(),
+            "version": self.version,
+            "blocks": [
+                {"block": block, "assignments": df.to_dict("records")}
+                for block, df in self.blocks(shift_blocks)
+            ],
+        }
+
+_boards = OrderedDict()
+_boards_lock = threading.Lock()
+
+def get_board(board_date):
+    """
+    Return the process-wide board for a date (shared by every screen),
+    refreshed with any new assignments.
+    """
+    with _boards_lock:
+        board = _boards.get(board_date)
+        if board is None:
+            board = _boards[board_date] = TVBoard(board_date)
+        # Keep only the most recently requested days
+        _boards.move_to_end(board_date)
+        while len(_boards) > MAX_BOARDS:
+            _boards.popitem(last=False)
+    board.refresh()
+    return board
@@ -0,0 +1,120 @@
+# tv_server.py
+"""
+Minimal read-only HTTP feed for the floor TVs, so each screen does not
+need its own Streamlit session.
+
+    python tv_server.py --port 8502
+
+GET /            a self-refreshing board page (today, or ?date=YYYY-MM-DD)
+GET /board.json  the board as JSON; send the last ETag in If-None-Match to
+                 get 304 Not Modified while nothing has changed
+"""
+import argparse
+import json
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import tv_feed
+from shifts import SHIFT_BLOCKS
+
+POLL_MILLISECONDS = 5000
+
+PAGE = """<!doctype html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Overtime Board</title>
+<style>
+  body { font-family: sans-serif; margin: 1.5rem; }
+  table { border-collapse: collapse; margin-bottom: 1rem; min-width: 40rem; }
+  th, td { border: 1px solid #ccc; padding: 0.3rem 0.6rem; text-align: left; }
+  .empty { color: #888; font-style: italic; }
+</style>
+</head>
+<body>
+<h1>Overtime Board <span id="date"></span></h1>
+<div id="board"></div>
+<script>
+let etag = null;
+const query = window.location.search;
+function esc(value) {
+  return String(value ?? "").replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+}
+async function poll() {
+  try {
+    const response = await fetch("board.json" + query, {headers: etag ? {"If-None-Match": etag} : {}});
+    if (response.status === 200) {
+      etag = response.headers.get("ETag");
+      const board = await response.json();
+      document.getElementById("date").textContent = board.date;
+      document.getElementById("board").innerHTML = board.blocks.map(b =>
+        b.assignments.length
+          ? `<h2>${esc(b.block)}</h2><table><tr><th>Line</th><th>Name</th><th>Position</th><th>Type</th></tr>` +
+            b.assignments.map(a => `<tr><td>${esc(a.Line)}</td><td>${esc(a.Name)}</td><td>${esc(a.Position)}</td><td>${esc(a.Type)}</td></tr>`).join("") +
+            "</table>"
+          : `<p class="empty">No assignments for ${esc(b.block)}</p>`
+      ).join("");
+    }
+  } finally {
+    setTimeout(poll, %(poll)d);
+  }
+}
+poll();
+</script>
+</body>
+</html>
+"""
+
+class BoardHandler(BaseHTTPRequestHandler):
+    """Serves the board page and its JSON feed; every other path is a 404."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/":
+            self._send(200, PAGE % {"poll": POLL_MILLISECONDS}, "text/html; charset=utf-8")
+        elif url.path == "/board.json":
+            self._send_board(parse_qs(url.query))
+        else:
+            self._send(404, "Not found", "text/plain")
+
+    def _send_board(self, query):
+        try:
+            board_date = date.fromisoformat(query["date"][0]) if "date" in query else date.today()
+        except ValueError:
+            self._send(400, "date must be YYYY-MM-DD", "text/plain")
+            return
+        board = tv_feed.get_board(board_date)
+        etag = f'"{board_date.isoformat()}-{board.last_id}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = json.dumps(board.to_dict(SHIFT_BLOCKS), default=str)
+        self._send(200, body, "application/json", {"ETag": etag})
+
+    def _send(self, status, body, content_type, headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-cache")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # The TVs poll constantly; don't log every request
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the read-only TV board feed.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8502)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), BoardHandler)
+    print(f"TV board on http://{args.host}:{args.port}/")
+    server.serve_forever()
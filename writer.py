@@ -0,0 +1,118 @@
+# writer.py
+"""
+One writer thread per process, owning a dedicated SQLite connection.
+
+Writes are queued as operations `op(conn, *args, **kwargs)` and the thread
+group-commits whatever is waiting: one BEGIN IMMEDIATE ... COMMIT per batch,
+with a SAVEPOINT around each operation so a failing one (a conflict, a stale
+request) is rolled back on its own and the rest of the batch still commits.
+Callers get a Future that resolves once their write is committed.
+
+With a dozen kiosks submitting at once the writes no longer fight over the
+database lock; they queue in memory and share commits (and fsyncs), so
+throughput grows with the number of submitters.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import database
+from instrumentation import record
+
+# Most operations committed together
+MAX_BATCH = 256
+
+class Writer:
+    """Queue of pending write operations drained by a single thread."""
+
+    def __init__(self, on_commit=None, max_batch=MAX_BATCH):
+        self._queue = queue.Queue()
+        self._on_commit = on_commit
+        self._max_batch = max_batch
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, op, *args, **kwargs):
+        """Queue `op(conn, *args, **kwargs)` and return a Future for its result."""
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("A write operation cannot queue another write.")
+        future = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((op, args, kwargs, future))
+        return future
+
+    def shutdown(self):
+        """Commit everything queued so far, then stop the thread and close its connection."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._queue.put(None)
+            self._thread = None
+        thread.join()
+
+    def _run(self):
+        conn = database.get_connection()
+        try:
+            running = True
+            while running:
+                item = self._queue.get()
+                batch = []
+                while item is not None:
+                    batch.append(item)
+                    if len(batch) >= self._max_batch:
+                        break
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                else:
+                    running = False
+                if batch:
+                    self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        """Run a batch in one transaction, then resolve its futures."""
+        started = time.perf_counter()
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for op, args, kwargs, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_op")
+                try:
+                    result = op(conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_op")
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE write_op")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+        except Exception as e:
+            # The transaction itself failed (e.g. the lock could not be had):
+            # nothing in the batch was written
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            record("writer.batch", time.perf_counter() - started, len(batch), error=True)
+            return
+
+        if self._on_commit is not None and any(error is None for _, _, error in outcomes):
+            self._on_commit()
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+        record("writer.batch", time.perf_counter() - started, len(batch))